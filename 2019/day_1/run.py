@@ -1,11 +1,15 @@
 import argparse
 import logging
 
+from itertools import islice
+
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
+parser.add_argument('--numpy', action='store_true', help='compute fuel for whole chunks of modules at once (requires numpy)')
+parser.add_argument('--chunk-size', type=int, default=1 << 20, help='modules loaded per chunk with --numpy')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
@@ -19,35 +23,92 @@ logging.getLogger().setLevel(logging.getLevelName(verbosity))
 # Helper Functions
 
 def calc_fuel(mass):
-    return max(0, int(mass / 3) - 2)
+    # Integer division stays exact for masses too large for a float
+    return max(0, mass // 3 - 2)
+
+
+def fuel_rounds(mass):
+    # Times the fuel recurrence applies before the fuel for this mass hits
+    # zero. Fuel only shrinks as mass does, so the heaviest module in a
+    # batch needs the most rounds.
+    rounds = 0
+    while mass > 0:
+        mass = calc_fuel(mass)
+        rounds += 1
+    return rounds
+
+
+def exact_sum(values):
+    # Sum of a non-negative int64 array as a Python int. Summing the high and
+    # low 32 bits separately keeps each partial sum within int64 (for chunks
+    # under 2 ** 31 values) where a plain sum would silently wrap.
+    high = int((values >> 32).sum())
+    low = int((values & 0xFFFFFFFF).sum())
+    return (high << 32) + low
+
+
+def calc_fuel_totals(masses):
+    # Vectorised version of the main loop for an int64 array of masses,
+    # returning (basic total, advanced total) as Python ints
+    import numpy as np
+
+    fuel = np.maximum(masses // 3 - 2, 0)
+    basic_total = advanced_total = exact_sum(fuel)
+    for _ in range(fuel_rounds(int(masses.max())) - 1):
+        fuel = np.maximum(fuel // 3 - 2, 0)
+        advanced_total += exact_sum(fuel)
+
+    return basic_total, advanced_total
 
 
 # Load Inputs
 
-input_file = args.input_file
-with open(input_file) as f:
-    masses = map(float, f.readlines())
+def load_mass_chunks(input_file, chunk_size):
+    # int64 arrays of at most chunk_size masses, read lazily
+    import numpy as np
 
-# Main Logic
+    with open(input_file) as f:
+        while True:
+            chunk = np.fromiter(map(int, islice(f, chunk_size)), dtype=np.int64)
+            if not len(chunk):
+                break
+            yield chunk
 
-basic_total = 0
-advanced_total = 0
-for mass in masses:
-    logging.debug(f'New Load Mass: {mass}')
 
-    basic_fuel_req = calc_fuel(mass)
-    logging.debug(f'\tBasic Fuel Req: {basic_fuel_req}')
+def load_masses(input_file):
+    with open(input_file) as f:
+        for line in f:
+            yield int(line)
 
-    unfueled_mass = basic_fuel_req
-    adv_fuel_req = basic_fuel_req
-    while unfueled_mass > 0:
-        unfueled_mass = calc_fuel(unfueled_mass)
-        adv_fuel_req += unfueled_mass
 
-    logging.debug(f'\tAdv. Fuel Req: {adv_fuel_req}')
+# Main Logic
 
-    basic_total += basic_fuel_req
-    advanced_total += adv_fuel_req
+if args.numpy:
+    basic_total = advanced_total = 0
+    for chunk in load_mass_chunks(args.input_file, args.chunk_size):
+        chunk_basic, chunk_advanced = calc_fuel_totals(chunk)
+        logging.debug(f'{len(chunk)} modules: {chunk_basic}, {chunk_advanced}')
+        basic_total += chunk_basic
+        advanced_total += chunk_advanced
+else:
+    basic_total = 0
+    advanced_total = 0
+    for mass in load_masses(args.input_file):
+        logging.debug(f'New Load Mass: {mass}')
+
+        basic_fuel_req = calc_fuel(mass)
+        logging.debug(f'\tBasic Fuel Req: {basic_fuel_req}')
+
+        unfueled_mass = basic_fuel_req
+        adv_fuel_req = basic_fuel_req
+        while unfueled_mass > 0:
+            unfueled_mass = calc_fuel(unfueled_mass)
+            adv_fuel_req += unfueled_mass
+
+        logging.debug(f'\tAdv. Fuel Req: {adv_fuel_req}')
+
+        basic_total += basic_fuel_req
+        advanced_total += adv_fuel_req
 
 logging.info(f'Basic Total Fuel: {basic_total}')
 logging.info(f'Adv. Total Fuel: {advanced_total}')
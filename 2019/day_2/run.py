@@ -1,11 +1,20 @@
 import argparse
 import logging
+import multiprocessing
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
+parser.add_argument('--workers', type=int, default=0, help='run programs in a pool of this many processes (0 runs them in this process)')
+parser.add_argument('--chunk-size', type=int, default=16, help='programs sent to a worker per task')
+parser.add_argument('--in-flight', type=int, help='most tasks queued in the pool at once (default: 4 per worker)')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
@@ -33,20 +42,7 @@ def mul(index, script):
     script[dest] = val_a * val_b
 
 
-# Load Inputs
-
-input_file = args.input_file
-with open(input_file) as f:
-    all_scripts = []
-    for line in f:
-        values = line.split(',')
-        values = list(map(int, values))
-        all_scripts.append(values)
-
-
-# Main Logic
-
-for script in all_scripts:
+def run_script(script):
     index = 0
     logging.debug(f'Start: {script}')
     while script[index] != 99:
@@ -61,5 +57,70 @@ for script in all_scripts:
         index += 4
 
     logging.debug(f'Final: {script}')
-    logging.info(f'Answer: {script[0]}')
+    return script[0]
+
+
+def timed_run_script(script):
+    start = time.perf_counter()
+    answer = run_script(script)
+    return answer, time.perf_counter() - start
+
+
+def timed_run_scripts(scripts):
+    return [timed_run_script(script) for script in scripts]
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ordered_pool_map(function, items, workers, in_flight):
+    # Like Executor.map, but pulls items lazily and keeps at most in_flight
+    # of them queued, so huge inputs are never held in memory all at once.
+    # Results come back in input order.
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
+# Load Inputs
+
+def load_scripts(input_file):
+    # One program per line, read lazily
+    with open(input_file) as f:
+        for line in f:
+            values = line.split(',')
+            values = list(map(int, values))
+            yield values
+
+
+# Main Logic
+
+all_scripts = load_scripts(args.input_file)
+if args.workers > 0:
+    chunks = chunked(all_scripts, args.chunk_size)
+    results = chain.from_iterable(ordered_pool_map(timed_run_scripts, chunks, args.workers, args.in_flight or 4 * args.workers))
+else:
+    results = map(timed_run_script, all_scripts)
+
+program_count = 0
+total_time = 0
+for answer, seconds in results:
+    program_count += 1
+    total_time += seconds
+    logging.info(f'Answer: {answer} ({seconds * 1000:.3f}ms)')
     logging.debug('')
+logging.info(f'Ran {program_count} programs in {total_time:.3f}s')
@@ -2,16 +2,20 @@ from __future__ import annotations  # Enable self-referential type hinting of a
 
 import argparse
 import logging
-import sys
+import multiprocessing
 
-from dataclasses import dataclass
-from typing import Dict, List, Tuple
+from concurrent.futures import ProcessPoolExecutor
+from typing import Dict, Iterable, List, Tuple
+
+from segments import SegmentIndex, find_intersections, wire_segments
 
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
+parser.add_argument('--multi-wire', action='store_true', help='treat every line as a wire on one shared board and report each pair that crosses')
+parser.add_argument('--workers', type=int, default=0, help='with --multi-wire, check wires in a pool of this many processes (0 checks them in this process)')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
@@ -36,70 +40,6 @@ class WireSpan:
         self.length = int(input_string[1:])
 
 
-@dataclass
-class BoundaryCoords:
-    x_min: int
-    x_max: int
-    y_min: int
-    y_max: int
-
-
-@dataclass
-class Circuit:
-    boundary: BoundaryCoords
-
-    circuit: List[List[str]] = None
-    wire_length_cache: Dict[str, List[List[int]]] = None
-
-    def __post_init__(self):
-        self.circuit = self._generate_empty_circuit()
-        self.wire_length_cache = dict()
-
-    def _generate_empty_circuit(self) -> List[List[str]]:  # noqa E501
-        circuit = []
-        for j in range(self.boundary.y_max - self.boundary.y_min + 1):
-            circuit.append([' ' for i in range(self.boundary.x_max - self.boundary.x_min + 1)])  # noqa E501b
-
-        return circuit
-
-    def draw_wire(
-        self,
-        wire: List[WireSpan],
-        icon: str,
-        x_min: int,
-        y_min: int
-    ) -> List[Tuple[int]]:
-        # Draws wire and returns coordinates of collisions with other wires
-
-        # Shift origin by x_min and y_min
-        x = -boundary.x_min
-        y = -boundary.y_min
-
-        # Store a circuit containing number of steps taken to each position
-        length_cache = self._generate_empty_circuit()
-
-        # Remember collision locations for returning
-        collisions = []
-
-        position = 0
-        for span in wire:
-            for _ in range(span.length):
-                x += span.direction[0]
-                y += span.direction[1]
-                position += 1
-
-                if self.circuit[y][x] != ' ' and self.circuit[y][x] != icon:
-                    collisions.append((x + x_min, y + y_min))
-                self.circuit[y][x] = icon
-
-                if length_cache[y][x] == ' ':
-                    length_cache[y][x] = position
-            # print_circuit(self.circuit)
-
-        self.wire_length_cache[icon] = length_cache
-        return collisions
-
-
 # Helper Functions
 
 def parse_wire(line: str) -> List[WireSpan]:
@@ -108,33 +48,7 @@ def parse_wire(line: str) -> List[WireSpan]:
     return spans
 
 
-def get_boundaries(wires: Tuple[List[WireSpan]]) -> BoundaryCoords:
-    x_min = x_max = y_min = y_max = 0
-
-    for wire in wires:
-        x = y = 0
-        for span in wire:
-            x += span.direction[0] * span.length
-            y += span.direction[1] * span.length
-            logging.debug(f'Boundary: {(x, y)}')
-
-            x_min = min(x_min, x)
-            x_max = max(x_max, x)
-            y_min = min(y_min, y)
-            y_max = max(y_max, y)
-
-    return BoundaryCoords(x_min, x_max, y_min, y_max)
-
-
-def print_circuit(circuit: List[List[int]]) -> None:
-    for row in circuit:
-        for value in row:
-            print(value, end='')
-        print('')  # Endline between rows
-    print('')      # Extra endline after circuits
-
-
-def find_nearest_distance(collisions: List[tuple]) -> int:
+def find_nearest_distance(collisions: Iterable[tuple]) -> int:
     nearest_distance = float('inf')
 
     for coords in collisions:
@@ -144,65 +58,74 @@ def find_nearest_distance(collisions: List[tuple]) -> int:
     return nearest_distance
 
 
-def find_shortest_walk(collisions: List[tuple], circuit: Circuit) -> int:
+def find_shortest_walk(collisions: Dict[tuple, Tuple[int, int]]) -> int:
     shortest_walk = float('inf')
 
-    for coords in collisions:
-        total_walk = 0
-        for icon, length_cache in circuit.wire_length_cache.items():
-            walk_length = length_cache[coords[1] - circuit.boundary.y_min][coords[0] - circuit.boundary.x_min]  # noqa E501
-            total_walk += walk_length
-            logging.debug(icon, walk_length)
-
-        shortest_walk = min(total_walk, shortest_walk)
+    for coords, walk_lengths in collisions.items():
+        logging.debug(f'{coords}: {walk_lengths}')
+        shortest_walk = min(sum(walk_lengths), shortest_walk)
 
     return shortest_walk
 
 
+def find_board_crossings(wire_id: int) -> List[Tuple[int, int, int, int]]:
+    # Summarise one wire's crossings with every later wire. Pool workers
+    # inherit board_index from the parent when they fork.
+    results = []
+    for other_wire, collisions in sorted(board_index.crossings(wire_id).items()):
+        results.append((wire_id, other_wire, find_nearest_distance(collisions), find_shortest_walk(collisions)))
+    return results
+
+
 # Load Inputs
 
 input_file = args.input_file
 with open(input_file) as f:
-    wire_pairs = []
+    if args.multi_wire:
+        board_wires = [wire_segments(parse_wire(line), wire_id) for wire_id, line in enumerate(f)]
+    else:
+        wire_pairs = []
 
-    for line in f:
-        wire_1 = parse_wire(line)
-        wire_2 = parse_wire(next(f))
+        for line in f:
+            wire_1 = parse_wire(line)
+            wire_2 = parse_wire(next(f))
 
-        wire_pairs.append((wire_1, wire_2))
+            wire_pairs.append((wire_1, wire_2))
 
 
 # Main Logic
 
-for wire_1, wire_2 in wire_pairs:
-    boundary = get_boundaries((wire_1, wire_2))
-    logging.debug(boundary)
-
-    circuit = Circuit(boundary)
-
-    try:
-        collisions = circuit.draw_wire(
-            wire_1,
-            'A',
-            boundary.x_min,
-            boundary.y_min
-        )
-        assert collisions == []
-        collisions = circuit.draw_wire(
-            wire_2,
-            'B',
-            boundary.x_min,
-            boundary.y_min
-        )
-        logging.debug(f'Collisions: {collisions}')
-    except IndexError:
-        logging.exception('Failed to write wires.')
-        sys.exit(1)
-
-    # print_circuit(circuit.wire_length_cache['A'])
-    # print_circuit(circuit.wire_length_cache['B'])
-
-    nearest_distance = find_nearest_distance(collisions)
-    shortest_walk = find_shortest_walk(collisions, circuit)
+if args.multi_wire:
+    board_index = SegmentIndex(board_wires)
+
+    if args.workers > 0:
+        context = multiprocessing.get_context('fork')
+        with ProcessPoolExecutor(args.workers, mp_context=context) as pool:
+            chunk_size = max(1, len(board_wires) // (4 * args.workers))
+            board_results = list(pool.map(find_board_crossings, range(len(board_wires)), chunksize=chunk_size))
+    else:
+        board_results = list(map(find_board_crossings, range(len(board_wires))))
+
+    nearest_distance = shortest_walk = float('inf')
+    crossing_pairs = 0
+    for wire_id, other_wire, pair_distance, pair_walk in (result for results in board_results for result in results):
+        crossing_pairs += 1
+        nearest_distance = min(nearest_distance, pair_distance)
+        shortest_walk = min(shortest_walk, pair_walk)
+        logging.info(f'Wires {wire_id} and {other_wire}: nearest point {pair_distance}, shortest walk {pair_walk}')
+
+    logging.info(f'{crossing_pairs} of {len(board_wires) * (len(board_wires) - 1) // 2} wire pairs cross')
     logging.info(f'Nearest point (manhattan distance): {nearest_distance}')
     logging.info(f'Shortest walk: {shortest_walk}')
+else:
+    for wire_1, wire_2 in wire_pairs:
+        # Sweep the wires' segments for crossings instead of drawing them on a
+        # grid, so memory and time scale with the number of spans rather than
+        # with the area the wires cover
+        collisions = find_intersections(wire_segments(wire_1, 0), wire_segments(wire_2, 1))
+        logging.debug(f'Collisions: {list(collisions)}')
+
+        nearest_distance = find_nearest_distance(collisions)
+        shortest_walk = find_shortest_walk(collisions)
+        logging.info(f'Nearest point (manhattan distance): {nearest_distance}')
+        logging.info(f'Shortest walk: {shortest_walk}')
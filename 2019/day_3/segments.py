@@ -0,0 +1,293 @@
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import Dict, Iterable, Iterator, List, Tuple
+
+
+Point = Tuple[int, int]
+
+
+@dataclass(frozen=True)
+class Segment:
+    # One straight span of a wire. The wire enters at `start`, which belongs
+    # to the previous span, and covers every point after it up to `end`.
+    wire: int
+    start: Point
+    end: Point
+    steps: int  # Steps the wire has taken when it reaches `start`
+
+    @property
+    def horizontal(self) -> bool:
+        return self.start[1] == self.end[1]
+
+    @property
+    def line(self) -> int:
+        # The fixed coordinate: y for horizontal segments, x for vertical ones
+        return self.start[1] if self.horizontal else self.start[0]
+
+    @property
+    def bounds(self) -> Tuple[int, int]:
+        # Range along the varying coordinate, start included
+        axis = 0 if self.horizontal else 1
+        return min(self.start[axis], self.end[axis]), max(self.start[axis], self.end[axis])
+
+    def steps_to(self, point: Point) -> int:
+        return self.steps + abs(point[0] - self.start[0]) + abs(point[1] - self.start[1])
+
+
+def wire_segments(wire, wire_id=0) -> List[Segment]:
+    # wire is a sequence of spans with .direction (unit (dx, dy)) and .length
+    segments = []
+    x = y = steps = 0
+    for span in wire:
+        if span.length == 0:
+            continue
+        end = (x + span.direction[0] * span.length, y + span.direction[1] * span.length)
+        segments.append(Segment(wire_id, (x, y), end, steps))
+        x, y = end
+        steps += span.length
+    return segments
+
+
+class ActiveRows:
+    '''Fenwick tree counting active segments per (compressed) row.
+
+    Supports adding/removing a segment and finding the k-th active segment in
+    row order, both in O(log n), so a range query can jump straight from one
+    occupied row to the next.
+    '''
+    def __init__(self, size):
+        self.size = size
+        self.tree = [0] * (size + 1)
+        self.top = 1 << max(size, 1).bit_length()
+
+    def add(self, row, delta):
+        index = row + 1
+        while index <= self.size:
+            self.tree[index] += delta
+            index += index & -index
+
+    def prefix(self, row) -> int:
+        # Active segments in rows [0, row)
+        total = 0
+        index = row
+        while index > 0:
+            total += self.tree[index]
+            index -= index & -index
+        return total
+
+    def kth(self, k) -> int:
+        # Row holding the k-th active segment (1-based)
+        index = 0
+        step = self.top
+        while step:
+            if index + step <= self.size and self.tree[index + step] < k:
+                index += step
+                k -= self.tree[index]
+            step >>= 1
+        return index
+
+
+def perpendicular_crossings(horizontals: List[Segment], verticals: List[Segment]) -> Iterator[Tuple[Point, Segment, Segment]]:
+    # Sweep a vertical line left to right. Horizontal segments are active
+    # between their end columns; each vertical segment reports the active
+    # ones within its row range. O((n + k) log n) for k crossings.
+    rows = sorted({segment.line for segment in horizontals})
+    row_index = {y: index for index, y in enumerate(rows)}
+    active_rows = ActiveRows(len(rows))
+    active: List[Dict[int, Segment]] = [dict() for _ in rows]
+
+    # At equal x: add horizontals, then query verticals, then remove horizontals
+    events = []
+    for index, segment in enumerate(horizontals):
+        x_min, x_max = segment.bounds
+        events.append((x_min, 0, index))
+        events.append((x_max, 2, index))
+    for index, segment in enumerate(verticals):
+        events.append((segment.line, 1, index))
+    events.sort()
+
+    for x, kind, index in events:
+        if kind == 1:
+            vertical = verticals[index]
+            y_min, y_max = vertical.bounds
+            k = active_rows.prefix(bisect_left(rows, y_min)) + 1
+            last = active_rows.prefix(bisect_right(rows, y_max))
+            while k <= last:
+                row = active_rows.kth(k)
+                for horizontal in active[row].values():
+                    yield (x, rows[row]), horizontal, vertical
+                k += len(active[row])
+            continue
+
+        segment = horizontals[index]
+        row = row_index[segment.line]
+        if kind == 0:
+            active[row][index] = segment
+            active_rows.add(row, 1)
+        else:
+            del active[row][index]
+            active_rows.add(row, -1)
+
+
+def collinear_overlaps(segments_a: List[Segment], segments_b: List[Segment]) -> Iterator[Tuple[Point, Segment, Segment]]:
+    # Segments of the same orientation lying on the same line: sweep along
+    # each shared line and yield every point where an A and a B segment overlap
+    lines: Dict[int, List[Tuple[int, int, int, Segment]]] = dict()
+    for side, segments in enumerate((segments_a, segments_b)):
+        for segment in segments:
+            low, high = segment.bounds
+            lines.setdefault(segment.line, []).append((low, 0, side, segment))
+            lines.setdefault(segment.line, []).append((high, 1, side, segment))
+
+    for line, events in lines.items():
+        active = ({}, {})
+        events.sort(key=lambda event: event[:3])
+        for position, kind, side, segment in events:
+            if kind == 1:
+                del active[side][id(segment)]
+                continue
+
+            for other in active[1 - side].values():
+                a, b = (segment, other) if side == 0 else (other, segment)
+                start = max(a.bounds[0], b.bounds[0])
+                stop = min(a.bounds[1], b.bounds[1])
+                for offset in range(start, stop + 1):
+                    point = (offset, line) if segment.horizontal else (line, offset)
+                    yield point, a, b
+            active[side][id(segment)] = segment
+
+
+def find_intersections(segments_a: List[Segment], segments_b: List[Segment]) -> Dict[Point, Tuple[int, int]]:
+    # Every point both wires cover, with the fewest steps each wire takes to
+    # reach it. A segment's start point belongs to the previous segment, so
+    # crossings exactly on one are dropped (and picked up from its neighbour).
+    horizontals_a = [segment for segment in segments_a if segment.horizontal]
+    verticals_a = [segment for segment in segments_a if not segment.horizontal]
+    horizontals_b = [segment for segment in segments_b if segment.horizontal]
+    verticals_b = [segment for segment in segments_b if not segment.horizontal]
+
+    def pairs() -> Iterable[Tuple[Point, Segment, Segment]]:
+        yield from perpendicular_crossings(horizontals_a, verticals_b)
+        for point, horizontal, vertical in perpendicular_crossings(horizontals_b, verticals_a):
+            yield point, vertical, horizontal
+        yield from collinear_overlaps(horizontals_a, horizontals_b)
+        yield from collinear_overlaps(verticals_a, verticals_b)
+
+    intersections = dict()
+    for point, a, b in pairs():
+        if point == a.start or point == b.start:
+            continue
+        steps_a = a.steps_to(point)
+        steps_b = b.steps_to(point)
+        if point in intersections:
+            best_a, best_b = intersections[point]
+            steps_a, steps_b = min(steps_a, best_a), min(steps_b, best_b)
+        intersections[point] = (steps_a, steps_b)
+
+    return intersections
+
+
+class LineBucket:
+    '''Segments lying on one line, sorted by where they begin.
+
+    A max-end tree over that order lets overlapping() skip every run of
+    segments that ends before the query range, so a lookup costs
+    O((hits + 1) log n) instead of walking every segment that begins before
+    the range ends.
+    '''
+    def __init__(self, segments: List[Segment]):
+        segments.sort(key=lambda segment: segment.bounds[0])
+        self.segments = segments
+        self.lows = [segment.bounds[0] for segment in segments]
+
+        # ends[size + i] is where segment i ends; each parent holds the
+        # furthest end below it
+        self.size = 1
+        while self.size < len(segments):
+            self.size *= 2
+        self.ends = [float('-inf')] * (2 * self.size)
+        for index, segment in enumerate(segments):
+            self.ends[self.size + index] = segment.bounds[1]
+        for node in range(self.size - 1, 0, -1):
+            self.ends[node] = max(self.ends[2 * node], self.ends[2 * node + 1])
+
+    def overlapping(self, low, high) -> Iterator[Segment]:
+        # Segments covering any of [low, high] along the line, in order
+        count = bisect_right(self.lows, high)  # Only these begin by high
+        stack = [(1, 0, self.size)] if count else []
+        while stack:
+            node, first, width = stack.pop()
+            if self.ends[node] < low:
+                continue
+            if width == 1:
+                yield self.segments[first]
+                continue
+
+            half = width // 2
+            if first + half < count:
+                stack.append((2 * node + 1, first + half, half))
+            stack.append((2 * node, first, half))
+
+
+class SegmentIndex:
+    '''Segments of many wires, bucketed by the line they lie on.
+
+    Horizontal segments are bucketed by row and vertical ones by column.
+    Looking up one segment only touches the bucket for its own line
+    (collinear overlaps) and the buckets for the lines it spans
+    (perpendicular crossings), and within a bucket only the segments that
+    actually reach it, so the cost follows the local density of the board
+    rather than the number of wires on it.
+    '''
+    def __init__(self, wires: List[List[Segment]]):
+        self.wires = wires
+        self.rows = self._bucket(segment for wire in wires for segment in wire if segment.horizontal)
+        self.columns = self._bucket(segment for wire in wires for segment in wire if not segment.horizontal)
+        self.row_keys = sorted(self.rows)
+        self.column_keys = sorted(self.columns)
+
+    @staticmethod
+    def _bucket(segments: Iterable[Segment]) -> Dict[int, LineBucket]:
+        lines: Dict[int, List[Segment]] = dict()
+        for segment in segments:
+            lines.setdefault(segment.line, []).append(segment)
+        return {line: LineBucket(bucket) for line, bucket in lines.items()}
+
+    def touching(self, segment: Segment) -> Iterator[Tuple[Point, Segment]]:
+        # Every (point, other segment) where another segment covers a point of
+        # this one, own wire included. Start points are not filtered here.
+        low, high = segment.bounds
+        if segment.horizontal:
+            same, crossing, crossing_keys = self.rows, self.columns, self.column_keys
+        else:
+            same, crossing, crossing_keys = self.columns, self.rows, self.row_keys
+
+        for other in same[segment.line].overlapping(low, high):
+            if other is not segment:
+                for offset in range(max(low, other.bounds[0]), min(high, other.bounds[1]) + 1):
+                    yield ((offset, segment.line) if segment.horizontal else (segment.line, offset)), other
+
+        for key_index in range(bisect_left(crossing_keys, low), bisect_right(crossing_keys, high)):
+            line = crossing_keys[key_index]
+            for other in crossing[line].overlapping(segment.line, segment.line):
+                yield ((line, segment.line) if segment.horizontal else (segment.line, line)), other
+
+    def crossings(self, wire_id: int) -> Dict[int, Dict[Point, Tuple[int, int]]]:
+        # Intersections of one wire with every later wire on the board, as
+        # other wire -> {point: (steps on this wire, steps on the other)}.
+        # Querying each wire in turn covers every pair exactly once.
+        found: Dict[int, Dict[Point, Tuple[int, int]]] = dict()
+        for segment in self.wires[wire_id]:
+            for point, other in self.touching(segment):
+                if other.wire <= wire_id or point == segment.start or point == other.start:
+                    continue
+
+                intersections = found.setdefault(other.wire, dict())
+                steps_a = segment.steps_to(point)
+                steps_b = other.steps_to(point)
+                if point in intersections:
+                    best_a, best_b = intersections[point]
+                    steps_a, steps_b = min(steps_a, best_a), min(steps_b, best_b)
+                intersections[point] = (steps_a, steps_b)
+
+        return found
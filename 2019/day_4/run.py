@@ -1,5 +1,12 @@
 import argparse
 import logging
+import multiprocessing
+import os
+import sys
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
 
 
 # Parse Arguments
@@ -7,6 +14,12 @@ import logging
 parser = argparse.ArgumentParser()
 parser.add_argument('start_value', type=int, help='Beginning of range to search')  # noqa E501
 parser.add_argument('end_value', type=int, help='End of range to search')
+parser.add_argument('--list', action='store_true', help='print every password meeting the simple criteria, in order, with whether it meets the advanced ones')  # noqa E501
+parser.add_argument('--enumerate', action='store_true', help='count by checking candidates one at a time instead of counting combinatorially')  # noqa E501
+parser.add_argument('--workers', type=int, default=0, help='check candidates one at a time, split across a pool of this many processes')  # noqa E501
+parser.add_argument('--chunk-size', type=int, default=1 << 16, help='simple matches per chunk of the range handed to a worker')  # noqa E501
+parser.add_argument('--in-flight', type=int, help='most chunks queued in the pool at once (default: 4 per worker)')  # noqa E501
+parser.add_argument('--output', help='with --workers, write every simple match (in order) to this file')  # noqa E501
 parser.add_argument('--verbosity', type=str, help='specify verbosity level (DEBUG|INFO)')  # noqa E501
 args = parser.parse_args()
 
@@ -15,6 +28,9 @@ if args.verbosity:
     verbosity = args.verbosity
 logging.getLogger().setLevel(logging.getLevelName(verbosity))
 
+if args.output and args.workers == 0:
+    parser.error('--output needs --workers')
+
 
 # Helper Functions
 
@@ -70,20 +86,231 @@ def increment(value):
     return value
 
 
+def next_candidate(value):
+    # Smallest number >= value whose digits never decrease
+    return increment(value - 1)
+
+
+def format_match(value, advanced):
+    return f'{value}: {True, advanced}'
+
+
+# Counting Engine
+#
+# Only numbers whose digits never decrease can match, and whether one does
+# depends on nothing but its last digit, the length of its current run of
+# repeated digits (capped at 3, as any run that long is no longer a pair)
+# and whether an earlier run already satisfied each rule. That is few enough
+# states to count every completion of a prefix at once, so a range is
+# counted digit by digit instead of candidate by candidate.
+
+def extend(state, digit):
+    # Append digit (>= the last one) to a prefix in state
+    # (last digit, run length, has pair, has exact pair)
+    last, run, has_pair, has_exact_pair = state
+    if digit == last:
+        run = min(run + 1, 3)
+    else:
+        has_exact_pair = has_exact_pair or run == 2
+        run = 1
+    return digit, run, has_pair or run >= 2, has_exact_pair
+
+
+@lru_cache(maxsize=None)
+def count_completions(state, remaining):
+    # (simple, advanced) matches among the non-decreasing ways of appending
+    # remaining more digits to a prefix in state
+    last, run, has_pair, has_exact_pair = state
+    if remaining == 0:
+        return int(has_pair), int(has_exact_pair or run == 2)
+
+    simple = advanced = 0
+    for digit in range(last, 10):
+        more_simple, more_advanced = count_completions(extend(state, digit), remaining - 1)  # noqa E501
+        simple += more_simple
+        advanced += more_advanced
+    return simple, advanced
+
+
+# Numbers never start with 0, so the empty prefix acts as if its last digit
+# were 1; its run length of 0 means the first digit can't complete a pair
+EMPTY_PREFIX = (1, 0, False, False)
+
+
+def count_below(limit):
+    # (simple, advanced) matches among the integers in [0, limit)
+    digits = list(map(int, str(limit))) if limit > 0 else []
+    simple = advanced = 0
+
+    # Every shorter number is below the limit
+    for length in range(1, len(digits)):
+        more_simple, more_advanced = count_completions(EMPTY_PREFIX, length)
+        simple += more_simple
+        advanced += more_advanced
+
+    # Numbers as long as the limit share a prefix with it, then go lower
+    state = EMPTY_PREFIX
+    for i, limit_digit in enumerate(digits):
+        for digit in range(state[0], limit_digit):
+            more_simple, more_advanced = count_completions(extend(state, digit), len(digits) - i - 1)  # noqa E501
+            simple += more_simple
+            advanced += more_advanced
+
+        if limit_digit < state[0]:
+            break  # No non-decreasing number shares any longer prefix
+        state = extend(state, limit_digit)
+
+    return simple, advanced
+
+
+def count_valid(start_value, end_value):
+    # (simple, advanced) matches in [start_value, end_value)
+    if end_value <= start_value:
+        return 0, 0
+    end_simple, end_advanced = count_below(end_value)
+    start_simple, start_advanced = count_below(max(start_value, 0))
+    return end_simple - start_simple, end_advanced - start_advanced
+
+
+def generate_valid(start_value, end_value):
+    # Lazily yield (value, meets advanced criteria) for every value in
+    # [start_value, end_value) meeting the simple criteria, in order.
+    # Prefixes whose range misses the bounds or that have no matching
+    # completions are skipped whole.
+    start_value = max(start_value, 0)
+
+    def walk(prefix, state, remaining):
+        if remaining == 0:
+            if state[2]:
+                yield prefix, state[3] or state[1] == 2
+            return
+
+        scale = 10 ** remaining
+        for digit in range(state[0], 10):
+            value = prefix * 10 + digit
+            low = value * scale // 10
+            high = low + scale // 10
+            if high <= start_value:
+                continue
+            if low >= end_value:
+                return
+
+            next_state = extend(state, digit)
+            if count_completions(next_state, remaining - 1)[0]:
+                yield from walk(value, next_state, remaining - 1)
+
+    if end_value <= start_value:
+        return
+    for length in range(len(str(start_value)), len(str(end_value - 1)) + 1):
+        yield from walk(0, EMPTY_PREFIX, length)
+
+
+# Parallel Enumeration
+
+def split_range(start_value, end_value, chunk_size):
+    # Lazily yield (start, end) chunks covering [start_value, end_value) that
+    # each hold about chunk_size simple matches, so workers get even shares
+    # even though matches bunch up at the low end of each digit length.
+    # Boundaries come from a binary search on count_below and are moved up
+    # to the next non-decreasing number, so every chunk after the first
+    # starts on a candidate.
+    chunk_start = start_value
+    while chunk_start < end_value:
+        target = count_below(chunk_start)[0] + chunk_size
+        low, high = chunk_start + 1, end_value
+        while low < high:
+            middle = (low + high) // 2
+            if count_below(middle)[0] >= target:
+                high = middle
+            else:
+                low = middle + 1
+
+        chunk_end = min(next_candidate(low), end_value)
+        yield chunk_start, chunk_end
+        chunk_start = chunk_end
+
+
+def enumerate_chunk(bounds):
+    # (value, meets advanced criteria) for every simple match in one chunk,
+    # checked candidate by candidate
+    chunk_start, chunk_end = bounds
+    matches = []
+    value = next_candidate(chunk_start)
+    while value < chunk_end:
+        if is_valid_simple(value):
+            matches.append((value, is_valid_advanced(value)))
+        value = increment(value)
+    return matches
+
+
+def ordered_pool_map(function, items, workers, in_flight):
+    # Like Executor.map, but pulls items lazily and keeps at most in_flight
+    # of them queued, so huge inputs are never held in memory all at once.
+    # Results come back in input order.
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(function, item))
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
+
 # Main Logic
 
-# 1. Increment (find next valid number quickly)
-# 2. Check whether it matches the simple and advanced criteria (separately)
-# 3. Print counts of simple and advanced matches
-simple_count = advanced_count = 0
-value = args.start_value
-while value < args.end_value:
-    if is_valid_simple(value):
-        simple_count += 1
-    if is_valid_advanced(value):
-        advanced_count += 1
-    value = increment(value)
-    logging.debug(f'{value}: {is_valid_simple(value), is_valid_advanced(value)}')  # noqa E501
-
-logging.info(f'Simple criteria: {simple_count}')
-logging.info(f'Advanced criteria: {advanced_count}')
+if args.list:
+    simple_count = advanced_count = 0
+    try:
+        for value, advanced in generate_valid(args.start_value, args.end_value):  # noqa E501
+            print(format_match(value, advanced))
+            simple_count += 1
+            advanced_count += advanced
+    except BrokenPipeError:
+        # Reader went away (e.g. piped into head). Point stdout at devnull
+        # so flushing it on exit doesn't raise again, and stop quietly.
+        os.dup2(os.open(os.devnull, os.O_WRONLY), sys.stdout.fileno())
+        sys.exit(1)
+
+    logging.info(f'Simple criteria: {simple_count}')
+    logging.info(f'Advanced criteria: {advanced_count}')
+
+elif args.workers > 0:
+    chunks = split_range(max(args.start_value, 0), args.end_value, args.chunk_size)  # noqa E501
+    in_flight = args.in_flight or 4 * args.workers
+
+    # Chunks are written as they arrive, so only the chunks in flight are
+    # ever held in memory
+    simple_count = advanced_count = 0
+    with open(args.output or os.devnull, 'w') as output:
+        for matches in ordered_pool_map(enumerate_chunk, chunks, args.workers, in_flight):  # noqa E501
+            simple_count += len(matches)
+            advanced_count += sum(advanced for _, advanced in matches)
+            output.writelines(f'{format_match(value, advanced)}\n' for value, advanced in matches)  # noqa E501
+
+    logging.info(f'Simple criteria: {simple_count}')
+    logging.info(f'Advanced criteria: {advanced_count}')
+
+elif not args.enumerate:
+    simple_count, advanced_count = count_valid(args.start_value, args.end_value)  # noqa E501
+
+    logging.info(f'Simple criteria: {simple_count}')
+    logging.info(f'Advanced criteria: {advanced_count}')
+
+else:
+    # 1. Increment (find next valid number quickly)
+    # 2. Check whether it matches the simple and advanced criteria (separately)
+    # 3. Print counts of simple and advanced matches
+    simple_count = advanced_count = 0
+    value = args.start_value
+    while value < args.end_value:
+        if is_valid_simple(value):
+            simple_count += 1
+        if is_valid_advanced(value):
+            advanced_count += 1
+        value = increment(value)
+        logging.debug(f'{value}: {is_valid_simple(value), is_valid_advanced(value)}')  # noqa E501
+
+    logging.info(f'Simple criteria: {simple_count}')
+    logging.info(f'Advanced criteria: {advanced_count}')
@@ -1,12 +1,34 @@
 import logging
 
-from dataclasses import dataclass
-from typing import List
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import List, Optional
+
+from profiler import Profiler
+
+
+def trace_functions(function_map):
+    # Wrap every function to log it before it runs. Only traced parsers pay
+    # for this; the plain functions never touch logging.
+    def wrap(function):
+        @wraps(function)
+        def traced(mode):
+            logging.debug(f'Function: {function.__name__} Mode: {mode}')
+            return function(mode)
+        return traced
+
+    return {opcode: wrap(function) for opcode, function in function_map.items()}
 
 
 @dataclass
 class Parser:
     program: List[int]
+    # Inputs popped from the end, instead of prompting; outputs are then
+    # collected instead of printed
+    simulated_inputs: Optional[List[int]] = None
+    simulated_outputs: List[int] = field(default_factory=list)
+    profiler: Optional[Profiler] = None
+    trace: Optional[bool] = None  # Log every instruction; defaults to whether DEBUG logging is on
 
     # Registers
     inst = 0  # Current Instruction pointer
@@ -24,6 +46,15 @@ class Parser:
             8: self._equals
         }
 
+        if self.profiler is not None:
+            self._function_map = self.profiler.instrument(self, self._function_map)
+
+        # Fixed here so the untraced run loop never checks the log level
+        if self.trace is None:
+            self.trace = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if self.trace:
+            self._function_map = trace_functions(self._function_map)
+
     # Main logic
     def run(self):
         self.inst = 0
@@ -34,11 +65,13 @@ class Parser:
             mode = int(str(int(instruction / 100)), 2)
 
             if opcode == 99:
-                print()
+                if self.simulated_inputs is None:
+                    print()
+                if self.profiler is not None:
+                    self.profiler.halted()
                 break
 
             function = self._function_map[opcode]
-            logging.debug(f'Function: {function.__name__} Mode: {mode}')
             function(mode)
             # logging.info(f'Program: {self.program}')
 
@@ -134,7 +167,12 @@ class Parser:
         ptr_dest = self.program[self.inst + 1]
 
         # Operation: Read user input
-        self.program[ptr_dest] = int(input('Gimme a number!'))
+        if self.simulated_inputs is None:
+            self.program[ptr_dest] = int(input('Gimme a number!'))
+        elif len(self.simulated_inputs) == 0:
+            raise BufferError('No input available for reading.')
+        else:
+            self.program[ptr_dest] = self.simulated_inputs.pop()
 
         # Update instruction pointer
         self.inst += 2
@@ -153,7 +191,10 @@ class Parser:
         ptr_dest = self.program[self.inst + 1]
 
         # Operation: Output value to console
-        print(self.program[ptr_dest])
+        if self.simulated_inputs is None:
+            print(self.program[ptr_dest])
+        else:
+            self.simulated_outputs.append(self.program[ptr_dest])
 
         # Update instruction pointer
         self.inst += 2
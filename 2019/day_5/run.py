@@ -1,12 +1,24 @@
 import argparse
 import logging
+import multiprocessing
+import time
+
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from itertools import chain
 
 from parser import Parser
+from profiler import Profiler
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
+parser.add_argument('--inputs', help='comma-separated values fed to every program, in order, instead of prompting')
+parser.add_argument('--workers', type=int, default=0, help='run programs in a pool of this many processes (0 runs them in this process; requires --inputs)')
+parser.add_argument('--chunk-size', type=int, default=16, help='programs sent to a worker per task')
+parser.add_argument('--in-flight', type=int, help='most tasks queued in the pool at once (default: 4 per worker)')
+parser.add_argument('--profile', help='write an opcode/address profile to PROFILE.txt and PROFILE.json')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
@@ -15,21 +27,91 @@ if args.verbosity:
     verbosity = args.verbosity
 logging.getLogger().setLevel(logging.getLevelName(verbosity))
 
+if args.workers > 0 and args.inputs is None:
+    parser.error('--workers needs --inputs, since pool workers cannot prompt for input')
+if args.workers > 0 and args.profile:
+    parser.error('--profile only covers programs run in this process, so it cannot be combined with --workers')
+
+profiler = Profiler(args.profile) if args.profile else None
+
+
+# Helper Functions
+
+def timed_run_program(program, inputs):
+    # Parser pops simulated inputs from the end
+    parser = Parser(program, inputs[::-1], profiler=profiler)
+    start = time.perf_counter()
+    parser.run()
+    return parser.simulated_outputs, time.perf_counter() - start
+
+
+def timed_run_programs(programs, inputs):
+    return [timed_run_program(program, inputs) for program in programs]
+
+
+def chunked(items, size):
+    chunk = []
+    for item in items:
+        chunk.append(item)
+        if len(chunk) == size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+def ordered_pool_map(function, items, workers, in_flight, *extra_args):
+    # Like Executor.map, but pulls items lazily and keeps at most in_flight
+    # of them queued, so huge inputs are never held in memory all at once.
+    # Results come back in input order.
+    context = multiprocessing.get_context('fork')
+    with ProcessPoolExecutor(workers, mp_context=context) as pool:
+        pending = deque()
+        for item in items:
+            pending.append(pool.submit(function, item, *extra_args))
+            if len(pending) >= in_flight:
+                yield pending.popleft().result()
+        while pending:
+            yield pending.popleft().result()
+
 
 # Load Inputs
 
-input_file = args.input_file
-with open(input_file) as f:
-    all_programs = []
-    for line in f:
-        values = line.split(',')
-        values = list(map(int, values))
-        all_programs.append(values)
+def load_programs(input_file):
+    # One program per line, read lazily
+    with open(input_file) as f:
+        for line in f:
+            values = line.split(',')
+            values = list(map(int, values))
+            yield values
 
 
 # Main Logic
 
-for i, program in enumerate(all_programs):
-    parser = Parser(program)
-    logging.info(f'Program {i}')
-    parser.run()
+all_programs = load_programs(args.input_file)
+
+if args.inputs is None:
+    for i, program in enumerate(all_programs):
+        parser = Parser(program, profiler=profiler)
+        logging.info(f'Program {i}')
+        parser.run()
+else:
+    inputs = list(map(int, args.inputs.split(','))) if args.inputs else []
+    if args.workers > 0:
+        chunks = chunked(all_programs, args.chunk_size)
+        in_flight = args.in_flight or 4 * args.workers
+        results = chain.from_iterable(ordered_pool_map(timed_run_programs, chunks, args.workers, in_flight, inputs))
+    else:
+        results = (timed_run_program(program, inputs) for program in all_programs)
+
+    program_count = 0
+    total_time = 0
+    for i, (outputs, seconds) in enumerate(results):
+        program_count += 1
+        total_time += seconds
+        logging.info(f'Program {i}: {outputs} ({seconds * 1000:.3f}ms)')
+    logging.info(f'Ran {program_count} programs in {total_time:.3f}s')
+
+if profiler is not None:
+    profiler.finish()
+    logging.info(f'Profile:\n{profiler.text_report()}')
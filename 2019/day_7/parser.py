@@ -1,20 +1,45 @@
 import logging
 
 from dataclasses import dataclass, field
-from typing import List
+from functools import wraps
+from typing import List, Optional, Union
+
+from cycles import SpinWatch
+from memory import PagedMemory
+from profiler import Profiler
+
+
+def trace_functions(function_map):
+    # Wrap every function to log it before it runs. Only traced parsers pay
+    # for this; the plain functions never touch logging.
+    def wrap(function):
+        @wraps(function)
+        def traced(mode):
+            logging.debug(f'Function: {function.__name__} Mode: {mode}')
+            return function(mode)
+        return traced
+
+    return {opcode: wrap(function) for opcode, function in function_map.items()}
 
 
 @dataclass
 class Parser:
-    program: List[int]
+    program: Union[List[int], PagedMemory]
     simulated_inputs: List[int]
     simulated_outputs: List[int] = field(default_factory=list)
+    profiler: Optional[Profiler] = None
+    paged_memory: bool = False
+    trace: Optional[bool] = None  # Log every instruction; defaults to whether DEBUG logging is on
+    spin_watch: Optional[SpinWatch] = None
 
     # Registers
     inst = 0  # Current Instruction pointer
 
     # Shortcut pointers to functions
     def __post_init__(self):
+        if self.paged_memory and not isinstance(self.program, PagedMemory):
+            self.program = PagedMemory(self.program)
+
         self._function_map = {
             1: self._add,
             2: self._multiply,
@@ -26,6 +51,17 @@ class Parser:
             8: self._equals
         }
 
+        if self.profiler is not None:
+            self._function_map = self.profiler.instrument(self, self._function_map)
+
+        # Fixed here so the untraced run loop never checks the log level
+        if self.trace is None:
+            self.trace = logging.getLogger().isEnabledFor(logging.DEBUG)
+        if self.trace:
+            self._function_map = trace_functions(self._function_map)
+        if self.spin_watch is not None:
+            self._function_map = self.spin_watch.instrument(self, self._function_map)
+
     # Main logic
     def run(self):
         while True:
@@ -35,10 +71,11 @@ class Parser:
 
             if opcode == 99:
                 logging.info('Exiting')
+                if self.profiler is not None:
+                    self.profiler.halted()
                 return
 
             function = self._function_map[opcode]
-            logging.debug(f'Function: {function.__name__} Mode: {mode}')
 
             output_val = function(mode)
             if output_val is not None:
@@ -1,71 +1,136 @@
 import argparse
 import logging
 
+from functools import lru_cache
 from itertools import permutations
 
+from cycles import CycleDetected, CycleDetector, HashedMemory, SpinWatch
 from parser import Parser
+from profiler import Profiler
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
 parser.add_argument('circuit', help='circuit type (basic|looping)')
+parser.add_argument('--amplifiers', type=int, default=5, help='number of amplifiers in the basic circuit')
+parser.add_argument('--phase-count', type=int, default=5, help='basic circuit phases are drawn from range(phase_count)')
+parser.add_argument('--detect-cycles', action='store_true', help='stop the looping circuit with a diagnostic if its state repeats')
+parser.add_argument('--profile', help='write an opcode/address profile to PROFILE.txt and PROFILE.json')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
+if args.amplifiers > args.phase_count:
+    parser.error('--amplifiers can be at most --phase-count, since each amplifier needs its own phase')
+
 verbosity = 'INFO'
 if args.verbosity:
     verbosity = args.verbosity
 logging.getLogger().setLevel(logging.getLevelName(verbosity))
 
+profiler = Profiler(args.profile) if args.profile else None
+
 
 # Helper Functions
 
-def basic_circuit(program):
-    best_output = -1
-    best_setting = -1
-    for phase_setting in permutations(range(5)):
-        prev_output = 0
-        for setting in phase_setting:
-            inputs = [setting, prev_output]
-            logging.debug(f'Running with inputs: {inputs}')
+def amplify(program, phase, signal):
+    # Parser pops inputs from the end of its queue
+    parser = Parser(program.copy(), [signal, phase], profiler=profiler)
+    return next(parser.run(), None)
+
+
+def search_phases(program, phases, amplifiers):
+    # Depth-first search over phase orderings. An amplifier's output only
+    # depends on its (phase, input signal), and the best way to finish a chain
+    # only on (unused phases, stages left, signal), so both are memoized and
+    # orderings that share a prefix reuse its work instead of rerunning it.
+    @lru_cache(maxsize=None)
+    def stage_output(phase, signal):
+        return amplify(program, phase, signal)
+
+    @lru_cache(maxsize=None)
+    def best_suffix(unused, stages_left, signal):
+        if stages_left == 0:
+            return signal, ()
+
+        best_output = best_setting = None
+        for phase in sorted(unused):
+            output, setting = best_suffix(unused - {phase}, stages_left - 1, stage_output(phase, signal))
+            if setting is None:
+                continue  # No way to finish the chain from here
+            if best_output is None or output > best_output:
+                best_output = output
+                best_setting = (phase,) + setting
+
+        return best_output, best_setting
+
+    return best_suffix(frozenset(phases), amplifiers, 0)
 
-            parser = Parser(program, inputs)
-            simulated_outputs = parser.run()
-            logging.debug(f'outputs: {simulated_outputs}')
 
-            assert len(simulated_outputs) == 1
-            prev_output = simulated_outputs[0]
+def format_setting(setting, phase_count):
+    # Digits run together as in the puzzle, unless a phase can take two
+    separator = ',' if phase_count > 10 else ''
+    return separator.join(map(str, setting))
 
-        if prev_output > best_output:
-            phase_str = ''.join(map(str, phase_setting))
-            logging.info(f' >> {phase_str, prev_output}')
-            best_output = prev_output
-            best_setting = phase_str
+
+def basic_circuit(program, phase_count=5, amplifiers=5):
+    best_output, best_setting = search_phases(program, range(phase_count), amplifiers)
+    phase_str = format_setting(best_setting, phase_count)
 
     logging.info(f'Best Output: {best_output}')
-    logging.info(f'Best Phase Setting: {best_setting}')
+    logging.info(f'Best Phase Setting: {phase_str}')
+
+
+def parser_state(parser):
+    return parser.inst, parser.program.snapshot(), tuple(parser.simulated_inputs)
+
 
+def circuit_state(circuit, signal):
+    # Everything the next round depends on
+    return signal, tuple(map(parser_state, circuit))
 
-def looping_circuit(program):
+
+def looping_circuit(program, detect_cycles=False):
     best_output = -1
     best_setting = -1
     for phase_setting in permutations(range(5, 10)):
-        phase_setting = [9, 7, 8, 5, 6]
-        # Build Circuit
-        circuit = [Parser(program, [setting]) for setting in phase_setting]
+        # Build Circuit. Parser pops inputs from the end of its queue, so each
+        # amplifier starts with its phase there and signals join at the front.
+        if detect_cycles:
+            # A SpinWatch per amplifier catches one looping without I/O,
+            # which would otherwise never finish its round to be checked
+            circuit = [
+                Parser(
+                    HashedMemory(program), [setting], profiler=profiler,
+                    spin_watch=SpinWatch(parser_state, lambda parser: f'instruction {parser.inst}, inputs {parser.simulated_inputs}')
+                )
+                for setting in phase_setting
+            ]
+            cycle_detector = CycleDetector()
+        else:
+            circuit = [Parser(program.copy(), [setting], profiler=profiler) for setting in phase_setting]
 
         # Loop through circuit until it stops
         prev_output = 0
         while True:
-            for index, program in enumerate(circuit):
-                program.simulated_inputs.append(prev_output)
-                logging.debug(f'P[{index}] inputs: {program.simulated_inputs}')
-
-                prev_output = next(program.run(), None)
-                logging.debug(f'output: {prev_output}')
-                if prev_output is None:
-                    break
+            try:
+                if detect_cycles:
+                    cycle_detector.check(
+                        circuit_state(circuit, prev_output),
+                        lambda: f'signal {prev_output}, instructions {[parser.inst for parser in circuit]}'
+                    )
+
+                for index, amplifier in enumerate(circuit):
+                    amplifier.simulated_inputs.insert(0, prev_output)
+                    logging.debug(f'P[{index}] inputs: {amplifier.simulated_inputs}')
+
+                    prev_output = next(amplifier.run(), None)
+                    logging.debug(f'output: {prev_output}')
+                    if prev_output is None:
+                        break
+            except CycleDetected as e:
+                logging.warning(f'Phase setting {phase_setting} never halts: {e}')
+                break
 
             if prev_output is None:
                 break
@@ -76,8 +141,6 @@ def looping_circuit(program):
                 best_output = prev_output
                 best_setting = phase_str
 
-        break
-
     logging.info(f'Best Output: {best_output}')
     logging.info(f'Best Phase Setting: {best_setting}')
 
@@ -93,8 +156,12 @@ with open(input_file) as f:
 # Main Logic
 
 if args.circuit == 'basic':
-    basic_circuit(program)
+    basic_circuit(program, args.phase_count, args.amplifiers)
 elif args.circuit == 'looping':
-    looping_circuit(program)
+    looping_circuit(program, args.detect_cycles)
 else:
     raise ValueError('circuit parameter must be either "basic" or "looping"')
+
+if profiler is not None:
+    profiler.finish()
+    logging.info(f'Profile:\n{profiler.text_report()}')
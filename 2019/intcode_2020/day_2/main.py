@@ -1,13 +1,19 @@
 import argparse
 import logging
+import multiprocessing
+import os
 import sys
 
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
+from typing import Dict, Iterator, List, Tuple, Union
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
+parser.add_argument('--grid-size', type=int, default=100, help='search nouns and verbs in range(grid_size)')
+parser.add_argument('--workers', type=int, default=os.cpu_count(), help='number of worker processes for the search')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
@@ -19,20 +25,162 @@ logging.getLogger().setLevel(logging.getLevelName(verbosity))
 
 # Helper classes
 
+class ConcreteValueRequired(ValueError):
+    # Raised when a symbolic value reaches a write address or an opcode
+    pass
+
+
+class Unknown:
+    # Value read through an address that depends on the noun or verb. It
+    # absorbs any arithmetic it takes part in; harmless unless it reaches the
+    # result or is used where a concrete value is required.
+    def __add__(self, other):
+        return self
+
+    __radd__ = __mul__ = __rmul__ = __add__
+
+    def __repr__(self):
+        return '?'
+
+
+UNKNOWN = Unknown()
+
+
+class Polynomial:
+    # Integer polynomial in the noun and verb, stored as
+    # {(noun_power, verb_power): coefficient}. Arithmetic returns a plain int
+    # whenever the result no longer depends on the noun or verb.
+    __slots__ = ('terms',)
+
+    def __init__(self, terms: Dict[Tuple[int, int], int]):
+        self.terms = terms
+
+    @staticmethod
+    def simplify(terms: Dict[Tuple[int, int], int]) -> Union[int, 'Polynomial']:
+        terms = {powers: coefficient for powers, coefficient in terms.items() if coefficient}
+        if not terms.keys() - {(0, 0)}:
+            return terms.get((0, 0), 0)
+        return Polynomial(terms)
+
+    @staticmethod
+    def _terms_of(value) -> Dict[Tuple[int, int], int]:
+        if isinstance(value, Polynomial):
+            return value.terms
+        return {(0, 0): value}
+
+    def __add__(self, other):
+        if not isinstance(other, (int, Polynomial)):
+            return NotImplemented
+
+        terms = dict(self.terms)
+        for powers, coefficient in self._terms_of(other).items():
+            terms[powers] = terms.get(powers, 0) + coefficient
+        return Polynomial.simplify(terms)
+
+    def __mul__(self, other):
+        if not isinstance(other, (int, Polynomial)):
+            return NotImplemented
+
+        terms = dict()
+        for (noun_a, verb_a), coefficient_a in self.terms.items():
+            for (noun_b, verb_b), coefficient_b in self._terms_of(other).items():
+                powers = (noun_a + noun_b, verb_a + verb_b)
+                terms[powers] = terms.get(powers, 0) + coefficient_a * coefficient_b
+        return Polynomial.simplify(terms)
+
+    __radd__ = __add__
+    __rmul__ = __mul__
+
+    def coefficients_in_verb(self, noun: int) -> Dict[int, int]:
+        # Substitute the noun, leaving {verb_power: coefficient}
+        coefficients = dict()
+        for (noun_power, verb_power), coefficient in self.terms.items():
+            coefficients[verb_power] = coefficients.get(verb_power, 0) + coefficient * noun ** noun_power
+        return coefficients
+
+    def __repr__(self):
+        monomials = []
+        for (noun_power, verb_power), coefficient in sorted(self.terms.items(), reverse=True):
+            factors = [str(coefficient)] if coefficient != 1 or noun_power == verb_power == 0 else []
+            factors += ['noun'] * noun_power + ['verb'] * verb_power
+            monomials.append('*'.join(factors))
+        return ' + '.join(monomials)
+
+
+NOUN = Polynomial({(1, 0): 1})
+VERB = Polynomial({(0, 1): 1})
+
+
+class ForkedMemory:
+    # Copy-on-write view of a shared program image. Reads fall through to the
+    # base list, writes only land in this fork's overlay, so creating a fork
+    # costs O(1) regardless of program size.
+    __slots__ = ('base', 'writes')
+
+    def __init__(self, base: List[int], writes: Dict[int, int] = None):
+        self.base = base
+        self.writes = writes if writes is not None else dict()
+
+    def __getitem__(self, index):
+        writes = self.writes
+        if index in writes:
+            return writes[index]
+        return self.base[index]
+
+    def __setitem__(self, index, value):
+        self.base[index]  # Raise IndexError for writes outside the image, like a list would
+        self.writes[index] = value
+
+    def __len__(self):
+        return len(self.base)
+
+    def __repr__(self):
+        return repr(self.materialize())
+
+    def materialize(self) -> List[int]:
+        memory = self.base.copy()
+        for index, value in self.writes.items():
+            memory[index] = value
+        return memory
+
+
 @dataclass
 class IntcodeComputer:
-    program: list
+    program: Union[List[int], ForkedMemory]
+    symbolic: bool = False
 
     def __post_init__(self):
         self.reset_registers()
 
-        self.opcode_map = {
-            1: self.add,
-            2: self.mul
-        }
+        if self.symbolic:
+            self.opcode_map = {
+                1: self.symbolic_add,
+                2: self.symbolic_mul
+            }
+        else:
+            self.opcode_map = {
+                1: self.add,
+                2: self.mul
+            }
 
     def copy(self):
-        return IntcodeComputer(self.program.copy())
+        return self.fork()
+
+    def snapshot(self) -> List[int]:
+        # Freeze the current memory into a base image shared with any forks.
+        # Only copies if this computer has written since its last snapshot.
+        if isinstance(self.program, ForkedMemory):
+            if not self.program.writes:
+                return self.program.base
+            base = self.program.materialize()
+        else:
+            base = self.program
+
+        self.program = ForkedMemory(base)
+        return base
+
+    def fork(self):
+        return IntcodeComputer(ForkedMemory(self.snapshot()), self.symbolic)
 
     def reset_registers(self):
         self.inst = 0
@@ -52,8 +200,12 @@ class IntcodeComputer:
         logging.debug(self.program)
 
     def step(self):
+        opcode = self.program[self.inst]
+        if self.symbolic and not isinstance(opcode, int):
+            raise ConcreteValueRequired(f'Symbolic opcode at {self.inst}: {opcode}')
+
         # Look up function name via opcode_map
-        func = self.opcode_map[self.program[self.inst]]
+        func = self.opcode_map[opcode]
         func()
 
     def add(self):
@@ -86,40 +238,194 @@ class IntcodeComputer:
 
         self.inst += 4
 
+    # Symbolic Opcode Functions
 
-# Load Inputs
+    def resolve_symbolic_parameters(self):
+        # Reads through a symbolic address can't be resolved, but they only
+        # matter if the value read is used later on
+        var1_index = self.program[self.inst + 1]
+        var1 = self.program[var1_index] if isinstance(var1_index, int) else UNKNOWN
 
-input_lines = []
-input_file = args.input_file
-with open(input_file) as f:
-    program = list(map(int, f.read().split(',')))
+        var2_index = self.program[self.inst + 2]
+        var2 = self.program[var2_index] if isinstance(var2_index, int) else UNKNOWN
 
-# Main Logic
+        dest_index = self.program[self.inst + 3]
+        if not isinstance(dest_index, int):
+            raise ConcreteValueRequired(f'Symbolic write address at {self.inst + 3}: {dest_index}')
 
-computer = IntcodeComputer(program)
+        return var1, var2, dest_index
 
-new_computer = computer.copy()
-new_computer.run()
-logging.info(f'Unmodified result: {new_computer.read(0)}')
+    def symbolic_add(self):
+        var1, var2, dest_index = self.resolve_symbolic_parameters()
 
-if verbosity == 'DEBUG':
-    sys.exit()
+        # Execute function
+        self.program[dest_index] = var1 + var2
 
-target_value = 19690720
-logging.info(f'Trying to produce {target_value}')
+        self.inst += 4
 
-for i in range(100):
-    for j in range(100):
-        new_computer = computer.copy()
+    def symbolic_mul(self):
+        var1, var2, dest_index = self.resolve_symbolic_parameters()
 
-        new_computer.write(1, i)
-        new_computer.write(2, j)
-        new_computer.run()
+        # Execute function
+        self.program[dest_index] = var1 * var2
+
+        self.inst += 4
+
+
+# Helper functions
+
+def solve_polynomial(result, target_value, grid_size) -> Iterator[Tuple[int, int]]:
+    # Yield every (noun, verb) in the grid for which result == target_value
+    if not isinstance(result, Polynomial):
+        if result == target_value:
+            yield from ((noun, verb) for noun in range(grid_size) for verb in range(grid_size))
+        return
+
+    for noun in range(grid_size):
+        coefficients = result.coefficients_in_verb(noun)
+        degree = max((power for power, coefficient in coefficients.items() if coefficient), default=0)
+
+        if degree == 0:
+            if coefficients.get(0, 0) == target_value:
+                yield from ((noun, verb) for verb in range(grid_size))
+        elif degree == 1:
+            # Linear in the verb: solve directly
+            offset = target_value - coefficients.get(0, 0)
+            slope = coefficients[1]
+            if offset % slope == 0 and 0 <= offset // slope < grid_size:
+                yield noun, offset // slope
+        else:
+            for verb in range(grid_size):
+                if sum(coefficient * verb ** power for power, coefficient in coefficients.items()) == target_value:
+                    yield noun, verb
+
+
+def solve_symbolically(program, target_value, grid_size):
+    # Run once with the noun and verb left as symbols and solve program[0] for
+    # the target. Raises ConcreteValueRequired if the program can't be
+    # evaluated symbolically, so the caller can fall back to a search.
+    computer = IntcodeComputer(ForkedMemory(program), symbolic=True)
+    computer.write(1, NOUN)
+    computer.write(2, VERB)
+    try:
+        computer.run()
+    except (IndexError, KeyError) as e:
+        raise ConcreteValueRequired(f'Symbolic run failed: {e!r}') from e
+
+    result = computer.read(0)
+    if result is UNKNOWN:
+        raise ConcreteValueRequired('Result depends on a symbolic address')
+    logging.info(f'Symbolic result: {result}')
+
+    # Addresses read through the noun/verb were never checked, so confirm
+    # each candidate with a concrete run
+    for noun, verb in solve_polynomial(result, target_value, grid_size):
+        candidate = IntcodeComputer(ForkedMemory(program))
+        candidate.write(1, noun)
+        candidate.write(2, verb)
+        try:
+            candidate.run()
+        except (IndexError, KeyError):
+            continue
+
+        if candidate.read(0) == target_value:
+            return noun, verb
+
+    return None
+
+
+# Per-process search state, set once by init_sweep_worker so the program is
+# only sent to each worker when the pool starts
+sweep_computer = None
+sweep_found = None
+
+
+def init_sweep_worker(program, found):
+    global sweep_computer, sweep_found
+    sweep_computer = IntcodeComputer(program)
+    sweep_found = found
+
+
+def sweep_nouns(chunk_index, nouns, grid_size, target_value):
+    for noun in nouns:
+        # An earlier chunk already holds the answer
+        if sweep_found.value < chunk_index:
+            return None
+
+        for verb in range(grid_size):
+            new_computer = sweep_computer.copy()
+
+            new_computer.write(1, noun)
+            new_computer.write(2, verb)
+            try:
+                new_computer.run()
+            except (IndexError, KeyError):
+                # Noun/verb pointed outside the program or produced a bad opcode
+                continue
+
+            if new_computer.read(0) == target_value:
+                with sweep_found.get_lock():
+                    sweep_found.value = min(sweep_found.value, chunk_index)
+                return noun, verb
+
+    return None
+
+
+def sweep(program, target_value, grid_size, workers):
+    # Split the noun axis into a few chunks per worker so idle workers can
+    # pick up more work. Results are taken in chunk order, so the answer is
+    # always the lowest matching noun/verb however the chunks finish; once a
+    # chunk matches, only the chunks before it still need to run.
+    chunk_size = max(1, grid_size // (workers * 4))
+    chunks = [range(start, min(start + chunk_size, grid_size)) for start in range(0, grid_size, chunk_size)]
+
+    found = multiprocessing.Value('i', len(chunks))  # Lowest chunk with a match so far
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=init_sweep_worker,
+        initargs=(program, found)
+    ) as executor:
+        futures = [executor.submit(sweep_nouns, index, chunk, grid_size, target_value) for index, chunk in enumerate(chunks)]
+        for index, future in enumerate(futures):
+            result = future.result()
+            if result is not None:
+                for unfinished in futures[index + 1:]:
+                    unfinished.cancel()
+                return result
+
+    return None
+
+
+# Load Inputs
+
+input_lines = []
+input_file = args.input_file
+with open(input_file) as f:
+    program = list(map(int, f.read().split(',')))
+
+# Main Logic
 
-        if new_computer.read(0) == target_value:
-            logging.info(f'Found. Final result: {100 * i + j}')
-            break
-    if new_computer.read(0) == target_value:
-        break
-else:
-    logging.info('Not found.')
+# Guarded so pool workers started by spawn don't rerun the search on import
+if __name__ == '__main__':
+    computer = IntcodeComputer(program)
+
+    new_computer = computer.copy()
+    new_computer.run()
+    logging.info(f'Unmodified result: {new_computer.read(0)}')
+
+    if verbosity == 'DEBUG':
+        sys.exit()
+
+    target_value = 19690720
+    logging.info(f'Trying to produce {target_value}')
+
+    try:
+        result = solve_symbolically(program, target_value, args.grid_size)
+    except ConcreteValueRequired as e:
+        logging.info(f'Falling back to concrete search ({e})')
+        result = sweep(program, target_value, args.grid_size, args.workers)
+    if result is not None:
+        noun, verb = result
+        logging.info(f'Found. Final result: {100 * noun + verb}')
+    else:
+        logging.info('Not found.')
@@ -26,6 +26,9 @@ class IntcodeComputer:
     def __post_init__(self):
         self.reset_registers()
 
+        # Checked once here so untraced runs never build debug messages
+        self.trace = logging.getLogger().isEnabledFor(logging.DEBUG)
+
         self.opcode_map = {
             1: self._add,
             2: self._mul,
@@ -47,15 +50,17 @@ class IntcodeComputer:
         return self.program[program_index]
 
     def write(self, program_index, value):
+        if self.trace:
+            logging.debug(f'Write: [{program_index}] {self.program[program_index]} -> {value}')
         self.program[program_index] = value
 
     def run(self):
         self.reset_registers()
 
         while self.program[self.inst] % 100 != 99:
-            logging.debug(self.program)
             self.step()
-        logging.debug(self.program)
+        if self.trace:
+            logging.debug(self.program)
 
     def step(self):
         # Look up function name via opcode_map
@@ -63,7 +68,8 @@ class IntcodeComputer:
         mode = int(str(int(self.program[self.inst] / 100)), 2)
 
         func = self.opcode_map[opcode]
-        logging.debug(f'Function: {func.__name__} Mode: {mode}')
+        if self.trace:
+            logging.debug(f'Function: {func.__name__} @ {self.inst} Mode: {mode}')
         func(mode)
 
     # Opcode Functions
@@ -85,7 +91,7 @@ class IntcodeComputer:
         dest_index = self.program[self.inst + 3]
 
         # Execute function
-        self.program[dest_index] = var1 + var2
+        self.write(dest_index, var1 + var2)
 
         self.inst += 4
 
@@ -106,7 +112,7 @@ class IntcodeComputer:
         dest_index = self.program[self.inst + 3]
 
         # Execute function
-        self.program[dest_index] = var1 * var2
+        self.write(dest_index, var1 * var2)
 
         self.inst += 4
 
@@ -115,7 +121,7 @@ class IntcodeComputer:
         dest_index = self.program[self.inst + 1]
 
         # Execute function
-        self.program[dest_index] = int(input('Gimme a number!'))
+        self.write(dest_index, int(input('Gimme a number!')))
 
         self.inst += 2
 
@@ -190,9 +196,9 @@ class IntcodeComputer:
 
         # Execute function
         if var1 < var2:
-            self.program[dest_index] = 1
+            self.write(dest_index, 1)
         else:
-            self.program[dest_index] = 0
+            self.write(dest_index, 0)
 
         self.inst += 4
 
@@ -214,9 +220,9 @@ class IntcodeComputer:
 
         # Execute function
         if var1 == var2:
-            self.program[dest_index] = 1
+            self.write(dest_index, 1)
         else:
-            self.program[dest_index] = 0
+            self.write(dest_index, 0)
 
         self.inst += 4
 
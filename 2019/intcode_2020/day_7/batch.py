@@ -0,0 +1,142 @@
+import numpy as np
+
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from intcodes import Status
+
+
+@dataclass
+class BatchComputer:
+    '''Runs many copies of one program in lockstep with NumPy.
+
+    Lane i starts from the same program image and reads inputs[i] in order.
+    Memory is a (lanes, cells) int64 array and every lane has its own
+    instruction pointer. Each step decodes all running lanes and executes
+    every distinct opcode once over the lanes that reached it, so lanes whose
+    control flow diverges keep advancing together.
+
+    Unlike Computer, values are int64 and can overflow.
+    '''
+    program: Sequence[int]
+    inputs: Sequence[Sequence[int]]
+
+    def __post_init__(self):
+        lanes = len(self.inputs)
+
+        self.memory = np.tile(np.asarray(self.program, dtype=np.int64), (lanes, 1))
+        self.inst = np.zeros(lanes, dtype=np.int64)
+
+        # Inputs are padded into a (lanes, longest input) array
+        width = max(1, max(map(len, self.inputs), default=0))
+        self.input_values = np.zeros((lanes, width), dtype=np.int64)
+        for lane, lane_inputs in enumerate(self.inputs):
+            self.input_values[lane, :len(lane_inputs)] = lane_inputs
+        self.input_counts = np.array([len(lane_inputs) for lane_inputs in self.inputs], dtype=np.int64)
+        self.input_index = np.zeros(lanes, dtype=np.int64)
+
+        self.running = np.ones(lanes, dtype=bool)
+        self.status: List[Optional[Status]] = [None] * lanes
+        self.outputs: List[List[int]] = [[] for _ in range(lanes)]
+
+        self.opcode_map = {
+            1: self._add,
+            2: self._mul,
+            3: self._read_input,
+            4: self._output,
+            5: self._jump_if_true,
+            6: self._jump_if_false,
+            7: self._less_than,
+            8: self._equals,
+            99: self._halt
+        }
+
+    def run(self) -> List[List[int]]:
+        # Run until every lane has halted or is waiting for input
+        while True:
+            lanes = np.flatnonzero(self.running)
+            if lanes.size == 0:
+                return self.outputs
+            self.step(lanes)
+
+    def step(self, lanes):
+        inst = self.inst[lanes]
+        instructions = self.memory[lanes, inst]
+        opcodes = instructions % 100
+
+        for opcode in np.unique(opcodes):
+            func = self.opcode_map[int(opcode)]
+            selected = opcodes == opcode
+            func(lanes[selected], inst[selected], instructions[selected])
+
+    def _param(self, lanes, inst, instructions, offset):
+        raw = self.memory[lanes, inst + offset]
+        immediate = instructions // 10 ** (offset + 1) % 10 == 1
+
+        # Only dereference lanes in position mode, so immediates are never
+        # used as addresses
+        pointers = np.where(immediate, 0, raw)
+        return np.where(immediate, raw, self.memory[lanes, pointers])
+
+    def _write(self, lanes, inst, offset, values):
+        self.memory[lanes, self.memory[lanes, inst + offset]] = values
+
+    # Opcode Functions
+
+    def _add(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        var2 = self._param(lanes, inst, instructions, 2)
+        self._write(lanes, inst, 3, var1 + var2)
+        self.inst[lanes] = inst + 4
+
+    def _mul(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        var2 = self._param(lanes, inst, instructions, 2)
+        self._write(lanes, inst, 3, var1 * var2)
+        self.inst[lanes] = inst + 4
+
+    def _read_input(self, lanes, inst, instructions):
+        # Lanes with no inputs left stop here
+        available = self.input_index[lanes] < self.input_counts[lanes]
+        for lane in lanes[~available].tolist():
+            self.status[lane] = Status.NEEDS_INPUT
+        self.running[lanes[~available]] = False
+
+        lanes = lanes[available]
+        inst = inst[available]
+        self._write(lanes, inst, 1, self.input_values[lanes, self.input_index[lanes]])
+        self.input_index[lanes] += 1
+        self.inst[lanes] = inst + 2
+
+    def _output(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        for lane, value in zip(lanes.tolist(), var1.tolist()):
+            self.outputs[lane].append(value)
+        self.inst[lanes] = inst + 2
+
+    def _jump_if_true(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        var2 = self._param(lanes, inst, instructions, 2)
+        self.inst[lanes] = np.where(var1 != 0, var2, inst + 3)
+
+    def _jump_if_false(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        var2 = self._param(lanes, inst, instructions, 2)
+        self.inst[lanes] = np.where(var1 == 0, var2, inst + 3)
+
+    def _less_than(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        var2 = self._param(lanes, inst, instructions, 2)
+        self._write(lanes, inst, 3, (var1 < var2).astype(np.int64))
+        self.inst[lanes] = inst + 4
+
+    def _equals(self, lanes, inst, instructions):
+        var1 = self._param(lanes, inst, instructions, 1)
+        var2 = self._param(lanes, inst, instructions, 2)
+        self._write(lanes, inst, 3, (var1 == var2).astype(np.int64))
+        self.inst[lanes] = inst + 4
+
+    def _halt(self, lanes, inst, instructions):
+        for lane in lanes.tolist():
+            self.status[lane] = Status.HALTED
+        self.running[lanes] = False
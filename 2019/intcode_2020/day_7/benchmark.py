@@ -0,0 +1,70 @@
+import argparse
+import logging
+import time
+
+from intcodes import Computer
+from loader import load_program
+
+# Parse Arguments
+
+parser = argparse.ArgumentParser()
+parser.add_argument('input_files', nargs='+', help='program files to benchmark')
+parser.add_argument('--inputs', default='', help='comma-separated values fed to each run, in order')
+parser.add_argument('--repeat', type=int, default=100, help='number of runs per engine')
+parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
+args = parser.parse_args()
+
+verbosity = 'INFO'
+if args.verbosity:
+    verbosity = args.verbosity
+logging.getLogger().setLevel(logging.getLevelName(verbosity))
+
+
+# Helper functions
+
+def run_interpreted(program, inputs):
+    return list(Computer(program, inputs).run())
+
+
+def run_cached(program, inputs):
+    return list(Computer(program, inputs, cache_instructions=True).run())
+
+
+def run_compiled(program, inputs):
+    return list(Computer(program, inputs).run_compiled())
+
+
+engines = {
+    'interpreted': run_interpreted,
+    'cached': run_cached,
+    'compiled': run_compiled
+}
+
+
+def benchmark(program, inputs, repeat):
+    timings = dict()
+    for name, engine in engines.items():
+        start = time.perf_counter()
+        for _ in range(repeat):
+            outputs = engine(program.copy(), inputs)
+        timings[name] = time.perf_counter() - start
+        logging.debug(f'{name} outputs: {outputs}')
+
+    return timings
+
+
+# Load Inputs
+
+inputs = list(map(int, args.inputs.split(','))) if args.inputs else []
+
+programs = dict()
+for input_file in args.input_files:
+    programs[input_file] = load_program(input_file)
+
+# Main Logic
+
+for input_file, program in programs.items():
+    timings = benchmark(program, inputs, args.repeat)
+    baseline = timings['interpreted']
+    for name, seconds in timings.items():
+        logging.info(f'{input_file} [{name}]: {seconds:.3f}s ({baseline / seconds:.1f}x)')
@@ -0,0 +1,168 @@
+import os
+import signal
+import tempfile
+
+from array import array
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Dict, List, Optional, Union
+
+from memory import PAGE_SIZE, PagedMemory
+
+
+# File layout (all int64): header, memory, pending inputs, outputs so far.
+# With FLAG_PAGED_MEMORY, memory is stored as its page table instead of
+# cell by cell: a page count, the page numbers, then each page's cells.
+# Version 1 files always stored memory densely.
+CHECKPOINT_MAGIC = 0x49434350  # 'ICCP'
+CHECKPOINT_VERSION = 2
+HEADER_WIDTH = 8  # magic, version, instruction pointer, steps, flags, memory/input/output lengths
+FLAG_PAGED_MEMORY = 1
+
+
+@dataclass
+class Checkpoint:
+    inst: int
+    steps: int
+    memory: Union[array, PagedMemory]
+    inputs: List[int]
+    outputs: List[int]
+    paged_memory: bool = False
+
+    def computer(self, **computer_args):
+        # A Computer that carries on from this checkpoint. Can be called
+        # repeatedly to fork several runs from the same state.
+        from intcodes import Computer
+
+        if isinstance(self.memory, PagedMemory):
+            memory = self.memory.copy()
+        else:
+            memory = self.memory.tolist()
+
+        computer = Computer(memory, self.inputs, paged_memory=self.paged_memory, **computer_args)
+        computer.inst = self.inst
+        return computer
+
+
+def save_checkpoint(path, machine, steps=0, outputs=()):
+    paged = isinstance(machine.program, PagedMemory)
+    header = array('q', [
+        CHECKPOINT_MAGIC,
+        CHECKPOINT_VERSION,
+        machine.inst,
+        steps,
+        FLAG_PAGED_MEMORY if paged else 0,
+        len(machine.program),
+        len(machine.queued_inputs),
+        len(outputs)
+    ])
+
+    # Write to a temporary file first so a kill mid-write keeps the old checkpoint
+    directory = os.path.dirname(os.path.abspath(path))
+    handle, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    with os.fdopen(handle, 'wb') as f:
+        header.tofile(f)
+        if paged:
+            page_table = list(machine.program.page_table())
+            array('q', [len(page_table)] + [page_number for page_number, _ in page_table]).tofile(f)
+            for _, page in page_table:
+                page.tofile(f)
+        else:
+            array('q', machine.program).tofile(f)
+        array('q', machine.queued_inputs).tofile(f)
+        array('q', outputs).tofile(f)
+    os.replace(temp_path, path)
+
+
+def load_checkpoint(path) -> Checkpoint:
+    with open(path, 'rb') as f:
+        header = array('q')
+        header.fromfile(f, HEADER_WIDTH)
+        magic, version, inst, steps, flags, memory_length, input_count, output_count = header
+        if magic != CHECKPOINT_MAGIC:
+            raise ValueError(f'{path} is not an Intcode checkpoint')
+        if version not in (1, CHECKPOINT_VERSION):
+            raise ValueError(f'{path} is checkpoint version {version}, expected {CHECKPOINT_VERSION}')
+
+        if version > 1 and flags & FLAG_PAGED_MEMORY:
+            page_count = array('q')
+            page_count.fromfile(f, 1)
+            page_numbers = array('q')
+            page_numbers.fromfile(f, page_count[0])
+
+            pages = []
+            for page_number in page_numbers:
+                page = array('q')
+                page.fromfile(f, PAGE_SIZE)
+                pages.append((page_number, page))
+            memory = PagedMemory.from_pages(memory_length, pages)
+        else:
+            memory = array('q')
+            memory.fromfile(f, memory_length)
+        inputs = array('q')
+        inputs.fromfile(f, input_count)
+        outputs = array('q')
+        outputs.fromfile(f, output_count)
+
+    return Checkpoint(inst, steps, memory, inputs.tolist(), outputs.tolist(), bool(flags & FLAG_PAGED_MEMORY))
+
+
+@dataclass
+class Checkpointer:
+    '''Saves a machine's state to `path` every `interval` steps or on request.
+
+    Like Profiler and TraceRecorder, it opts in by wrapping the opcode map, so
+    checkpoints are only taken between instructions, when the state is
+    consistent. Outputs produced so far are kept and saved with the state.
+    Values must fit in an int64. run_compiled() bypasses the opcode map and
+    takes no checkpoints.
+    '''
+    path: str
+    interval: Optional[int] = None
+    steps: int = 0
+    outputs: List[int] = field(default_factory=list)
+
+    def __post_init__(self):
+        self.requested = False
+        self.exit_requested = False
+
+    @classmethod
+    def resuming(cls, path, checkpoint: Checkpoint, interval=None):
+        # Carry on counting steps and collecting outputs where `checkpoint` stopped
+        return cls(path, interval, checkpoint.steps, list(checkpoint.outputs))
+
+    def handle_signals(self, checkpoint_signals=(signal.SIGUSR1,), exit_signals=(signal.SIGTERM,)):
+        # checkpoint_signals save at the next step; exit_signals save and then
+        # raise SystemExit, so a scheduler's kill leaves a resumable checkpoint
+        def request(signum, frame):
+            self.requested = True
+
+        def request_exit(signum, frame):
+            self.requested = self.exit_requested = True
+
+        for signum in checkpoint_signals:
+            signal.signal(signum, request)
+        for signum in exit_signals:
+            signal.signal(signum, request_exit)
+
+    def instrument(self, machine, opcode_map) -> Dict:
+        def wrap(handler):
+            @wraps(handler)
+            def checkpointed(mode):
+                output = handler(mode)
+                if output is not None:
+                    self.outputs.append(output)
+
+                self.steps += 1
+                if self.requested or (self.interval and self.steps % self.interval == 0):
+                    self.save(machine)
+                return output
+            return checkpointed
+
+        return {opcode: wrap(handler) for opcode, handler in opcode_map.items()}
+
+    def save(self, machine):
+        save_checkpoint(self.path, machine, self.steps, self.outputs)
+        self.requested = False
+        if self.exit_requested:
+            raise SystemExit(f'Checkpointed to {self.path} after {self.steps} steps')
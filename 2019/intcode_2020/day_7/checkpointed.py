@@ -0,0 +1,56 @@
+import argparse
+import logging
+
+from checkpoint import Checkpointer, load_checkpoint
+from intcodes import Computer
+from loader import load_program
+
+# Parse Arguments
+
+parser = argparse.ArgumentParser()
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+start_parser = subparsers.add_parser('start', help='run a program from the beginning, checkpointing as it goes')
+start_parser.add_argument('input_file', help='program file to run')
+start_parser.add_argument('checkpoint_file', help='checkpoint file to write')
+
+resume_parser = subparsers.add_parser('resume', help='carry on from a checkpoint')
+resume_parser.add_argument('checkpoint_file', help='checkpoint file to read')
+resume_parser.add_argument('--save-to', help='write new checkpoints here instead, leaving the original to fork from again')
+
+for subparser in (start_parser, resume_parser):
+    subparser.add_argument('--inputs', default='', help='comma-separated values queued for the program, in order (after any pending ones)')
+    subparser.add_argument('--interval', type=int, default=1000000, help='steps between checkpoints (0 only checkpoints on signal)')
+
+parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
+args = parser.parse_args()
+
+verbosity = 'INFO'
+if args.verbosity:
+    verbosity = args.verbosity
+logging.getLogger().setLevel(logging.getLevelName(verbosity))
+
+
+# Main Logic
+
+inputs = list(map(int, args.inputs.split(','))) if args.inputs else []
+
+if args.command == 'start':
+    checkpointer = Checkpointer(args.checkpoint_file, args.interval)
+    computer = Computer(load_program(args.input_file), inputs, checkpointer=checkpointer)
+else:
+    checkpoint = load_checkpoint(args.checkpoint_file)
+    logging.info(f'Resuming at step {checkpoint.steps}, instruction {checkpoint.inst}, with {len(checkpoint.outputs)} outputs so far')
+
+    checkpointer = Checkpointer.resuming(args.save_to or args.checkpoint_file, checkpoint, args.interval)
+    computer = checkpoint.computer(checkpointer=checkpointer)
+    computer.feed(inputs)
+
+# SIGUSR1 checkpoints and carries on; SIGTERM checkpoints and exits
+checkpointer.handle_signals()
+
+for output in computer.run():
+    logging.debug(f'Output: {output}')
+
+logging.info(f'Halted after {checkpointer.steps} steps')
+logging.info(f'Outputs: {checkpointer.outputs}')
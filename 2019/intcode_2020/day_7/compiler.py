@@ -0,0 +1,208 @@
+from collections import OrderedDict
+from dataclasses import dataclass, field
+from typing import Callable, ClassVar, Dict, List, Set, Tuple, Union
+
+from memory import PagedMemory
+
+
+# Sentinel returned by a compiled block in place of an output value when the
+# program reaches opcode 99
+HALT = object()
+
+# Number of cells occupied by each opcode (including the opcode itself)
+INSTRUCTION_LENGTHS = {
+    1: 4,
+    2: 4,
+    3: 2,
+    4: 2,
+    5: 3,
+    6: 3,
+    7: 4,
+    8: 4,
+    99: 1
+}
+
+
+@dataclass
+class CompiledBlock:
+    start: int
+    end: int  # One past the last cell read while compiling the block
+    function: Callable
+
+
+@dataclass
+class BlockCompiler:
+    '''Compiles straight-line runs of Intcode into Python functions.
+
+    A block runs from its start address up to and including the first input,
+    output, jump or halt. Parameter modes and positional addresses are
+    resolved at compile time, so each block is a single function of the
+    memory list and input queue that returns (next instruction, output).
+    Writes landing on a compiled block drop that block from the cache; it is
+    recompiled from the new memory contents the next time it is entered.
+
+    Compiling a block costs as much as interpreting it a few dozen times, so
+    callers only compile blocks that have been entered hot_threshold times
+    (see is_hot()) and interpret the rest.
+    '''
+    program: Union[List[int], PagedMemory]
+    blocks: Dict[int, CompiledBlock] = field(default_factory=dict)
+    hot_threshold: int = 16
+    entries: Dict[int, int] = field(default_factory=dict)  # Start address -> times entered while cold
+
+    # Generated functions depend only on the cells they were compiled from, so
+    # they are shared between compilers (e.g. many runs of the same image),
+    # keyed by (start, cells). Programs patched from their input add a new
+    # variant per run, so only the most recently used are kept.
+    shared_code: ClassVar['OrderedDict[Tuple[int, Tuple[int, ...]], Callable]'] = OrderedDict()
+    shared_code_limit: ClassVar[int] = 4096
+    # Lengths of blocks compiled so far at each start, so a cached block can
+    # be found from a slice without decoding it first. Patched variants of a
+    # block almost always keep its length, so these sets stay tiny.
+    shared_lengths: ClassVar[Dict[int, Set[int]]] = dict()
+
+    def __post_init__(self):
+        # Number of compiled blocks covering each address. Generated code
+        # checks this before every write to catch self-modifying programs.
+        if isinstance(self.program, PagedMemory):
+            self.code_refs = PagedMemory()
+        else:
+            self.code_refs = [0] * len(self.program)
+
+    def get_block(self, program_index) -> Callable:
+        block = self.blocks.get(program_index)
+        if block is None:
+            block = self.compile_block(program_index)
+        return block.function
+
+    def is_hot(self, program_index) -> bool:
+        # Count one more entry into the uncompiled block at program_index
+        count = self.entries.get(program_index, 0) + 1
+        if count < self.hot_threshold:
+            self.entries[program_index] = count
+            return False
+        self.entries.pop(program_index, None)
+        return True
+
+    def invalidate(self, program_index):
+        if not self.code_refs[program_index]:
+            return
+
+        stale = [block for block in self.blocks.values() if block.start <= program_index < block.end]
+        for block in stale:
+            del self.blocks[block.start]
+            for index in range(block.start, block.end):
+                self.code_refs[index] -= 1
+
+    def decode_block(self, start) -> Tuple[List[int], int]:
+        # Addresses of the instructions making up the block at start, and the
+        # address just past it. The block's extent depends only on the cells
+        # it covers, so those cells identify its generated code.
+        program = self.program
+        instructions = []
+        written = set()
+
+        inst = start
+        while True:
+            # Stop before any instruction modified earlier in this block
+            if inst in written:
+                break
+
+            opcode = program[inst] % 100
+            if opcode not in INSTRUCTION_LENGTHS:
+                if inst == start:
+                    raise KeyError(opcode)
+                break
+
+            length = INSTRUCTION_LENGTHS[opcode]
+            if written.intersection(range(inst, inst + length)):
+                break
+
+            instructions.append(inst)
+            if opcode in (1, 2, 7, 8):
+                written.add(program[inst + 3])
+            elif opcode == 3:
+                written.add(program[inst + 1])
+
+            inst += length
+            if opcode in (3, 4, 5, 6, 99):
+                break
+
+        return instructions, inst
+
+    def compile_block(self, start) -> CompiledBlock:
+        program = self.program
+
+        for length in self.shared_lengths.get(start, ()):
+            key = (start, tuple(program[start:start + length]))
+            function = self.shared_code.get(key)
+            if function is not None:
+                self.shared_code.move_to_end(key)
+                return self._register(CompiledBlock(start, start + length, function))
+
+        instructions, end = self.decode_block(start)
+        key = (start, tuple(program[start:end]))
+
+        lines = [f'def block_{start}(m, inputs, c, inv):']
+
+        def param(index, immediate):
+            value = program[index]
+            if immediate:
+                return repr(value)
+            return f'm[{value}]'
+
+        def emit_write(dest, expression):
+            lines.append(f'    m[{dest}] = {expression}')
+            lines.append(f'    if c[{dest}]:')
+            lines.append(f'        inv({dest})')
+
+        opcode = None
+        for inst in instructions:
+            opcode = program[inst] % 100
+            mode_a = program[inst] // 100 % 10
+            mode_b = program[inst] // 1000 % 10
+
+            next_inst = inst + INSTRUCTION_LENGTHS[opcode]
+            if opcode == 1:
+                emit_write(program[inst + 3], f'{param(inst + 1, mode_a)} + {param(inst + 2, mode_b)}')
+            elif opcode == 2:
+                emit_write(program[inst + 3], f'{param(inst + 1, mode_a)} * {param(inst + 2, mode_b)}')
+            elif opcode == 7:
+                emit_write(program[inst + 3], f'int({param(inst + 1, mode_a)} < {param(inst + 2, mode_b)})')
+            elif opcode == 8:
+                emit_write(program[inst + 3], f'int({param(inst + 1, mode_a)} == {param(inst + 2, mode_b)})')
+            elif opcode == 3:
+                emit_write(program[inst + 1], 'inputs.popleft()')
+                lines.append(f'    return {next_inst}, None')
+            elif opcode == 4:
+                lines.append(f'    return {next_inst}, {param(inst + 1, mode_a)}')
+            elif opcode == 5:
+                lines.append(f'    if {param(inst + 1, mode_a)} != 0:')
+                lines.append(f'        return {param(inst + 2, mode_b)}, None')
+                lines.append(f'    return {next_inst}, None')
+            elif opcode == 6:
+                lines.append(f'    if {param(inst + 1, mode_a)} == 0:')
+                lines.append(f'        return {param(inst + 2, mode_b)}, None')
+                lines.append(f'    return {next_inst}, None')
+            elif opcode == 99:
+                lines.append(f'    return {inst}, HALT')
+
+        # Blocks cut short by a write to their own code fall through to it
+        if opcode not in (3, 4, 5, 6, 99):
+            lines.append(f'    return {end}, None')
+
+        namespace = {'HALT': HALT}
+        exec(compile('\n'.join(lines), f'<intcode block {start}>', 'exec'), namespace)
+
+        block = CompiledBlock(start, end, namespace[f'block_{start}'])
+        self.shared_code[key] = block.function
+        self.shared_lengths.setdefault(start, set()).add(end - start)
+        if len(self.shared_code) > self.shared_code_limit:
+            self.shared_code.popitem(last=False)
+        return self._register(block)
+
+    def _register(self, block: CompiledBlock) -> CompiledBlock:
+        self.blocks[block.start] = block
+        for index in range(block.start, block.end):
+            self.code_refs[index] += 1
+        return block
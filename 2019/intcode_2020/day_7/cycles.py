@@ -0,0 +1,152 @@
+# Source of the copy in day_7/cycles.py; copy any change made here over to it.
+
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Any, Callable, Dict, Hashable
+
+
+class CycleDetected(RuntimeError):
+    pass
+
+
+class HashedMemory(list):
+    '''list that keeps a digest of its contents up to date on every write.
+
+    The digest XORs together one hash per (address, value) pair, so a write
+    only has to swap out the old pair's hash for the new one and reading it
+    is free. Only item assignment is tracked; Intcode engines never resize
+    their memory.
+    '''
+    def __init__(self, values=()):
+        super().__init__(values)
+        self.digest = 0
+        for index, value in enumerate(self):
+            self.digest ^= hash((index, value))
+        self._snapshot = None
+
+    def __setitem__(self, index, value):
+        old_value = self[index]
+        super().__setitem__(index, value)
+        self.digest ^= hash((index, old_value)) ^ hash((index, value))
+        self._snapshot = None
+
+    def copy(self):
+        return HashedMemory(self)
+
+    def snapshot(self):
+        # Reused until the next write, so machines that haven't changed
+        # share one copy between fingerprints
+        if self._snapshot is None:
+            self._snapshot = MemorySnapshot(self.digest, tuple(self))
+        return self._snapshot
+
+
+class MemorySnapshot:
+    '''Frozen copy of a HashedMemory for use in fingerprints.
+
+    Hashes by the digest, so lookups stay cheap, but only compares equal when
+    the contents match, so memories whose digests collide are never mistaken
+    for one another.
+    '''
+    __slots__ = ('digest', 'values')
+
+    def __init__(self, digest, values):
+        self.digest = digest
+        self.values = values
+
+    def __hash__(self):
+        return self.digest
+
+    def __eq__(self, other):
+        return self.digest == other.digest and self.values == other.values
+
+
+@dataclass
+class CycleDetector:
+    '''Remembers every state it is shown.
+
+    The caller passes the complete state of a deterministic system at
+    comparable points (e.g. whenever a machine blocks for input); seeing one
+    again means the system will loop forever. States are kept whole rather
+    than as hashes, so only a true repeat counts. Systems that never halt
+    without repeating a state (e.g. an ever-growing counter) go unnoticed.
+    '''
+    seen: Dict[Hashable, int] = field(default_factory=dict)  # State -> event it was first seen at
+    events: int = 0
+
+    def check(self, state: Hashable, describe: Callable[[], str]):
+        # describe is only called to build the diagnostic once a cycle is found
+        self.events += 1
+        first_seen = self.seen.setdefault(state, self.events)
+        if first_seen != self.events:
+            raise CycleDetected(
+                f'State at event {self.events} repeats event {first_seen} '
+                f'(cycle length {self.events - first_seen}): {describe()}'
+            )
+
+
+@dataclass
+class SpinWatch:
+    '''Catches a single machine looping forever without doing any I/O.
+
+    Such a machine never blocks for input, so a CycleDetector fed at those
+    points never sees it. instrument() wraps its jump handlers instead and
+    samples the machine's own state on every interval-th jump taken
+    backwards (or to itself). Samples are compared Brent-style against one
+    saved state that is replaced at doubling distances, so memory stays
+    constant however long the machine runs. Reading input or producing
+    output starts the search over, since either changes what the machine
+    does next.
+    '''
+    state: Callable[[Any], Hashable]  # Complete state of a watched machine
+    describe: Callable[[Any], str]
+    interval: int = 1000
+
+    def __post_init__(self):
+        self.reset()
+
+    def reset(self):
+        self.jumps = 0
+        self.saved = None
+        self.power = self.distance = 1
+
+    def sample(self, machine):
+        state = self.state(machine)
+        if state == self.saved:
+            raise CycleDetected(
+                f'State repeats every {self.distance} samples of {self.interval} '
+                f'backward jumps without any I/O: {self.describe(machine)}'
+            )
+        if self.distance == self.power:
+            self.saved = state
+            self.power *= 2
+            self.distance = 0
+        self.distance += 1
+
+    def instrument(self, machine, opcode_map):
+        def watch_jump(handler):
+            @wraps(handler)
+            def watched(mode):
+                address = machine.inst
+                result = handler(mode)
+                if machine.inst <= address:
+                    self.jumps += 1
+                    if self.jumps == self.interval:
+                        self.jumps = 0
+                        self.sample(machine)
+                return result
+            return watched
+
+        def watch_io(handler):
+            @wraps(handler)
+            def watched(mode):
+                self.reset()
+                return handler(mode)
+            return watched
+
+        watched_map = dict(opcode_map)
+        for opcode in (3, 4):
+            watched_map[opcode] = watch_io(opcode_map[opcode])
+        for opcode in (5, 6):
+            watched_map[opcode] = watch_jump(opcode_map[opcode])
+        return watched_map
@@ -0,0 +1,52 @@
+import argparse
+import logging
+
+from disassembler import Analysis, specialize
+from loader import load_program
+
+# Parse Arguments
+
+parser = argparse.ArgumentParser()
+parser.add_argument('input_file', help='program file to disassemble')
+parser.add_argument('--inputs', default='', help='comma-separated inputs known ahead of time (e.g. a phase setting) to run past before analysing')
+parser.add_argument('--optimized', help='write the constant-folded program to this file')
+parser.add_argument('--quiet', action='store_true', help='skip the listing and only print the summary')
+parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
+args = parser.parse_args()
+
+verbosity = 'INFO'
+if args.verbosity:
+    verbosity = args.verbosity
+logging.getLogger().setLevel(logging.getLevelName(verbosity))
+
+
+# Main Logic
+
+program = load_program(args.input_file)
+
+entry = 0
+if args.inputs:
+    program, entry, unread = specialize(program, list(map(int, args.inputs.split(','))))
+    logging.info(f'Specialized on --inputs up to address {entry}')
+    if unread:
+        logging.warning(f'Stopped before reading inputs {unread}; the optimized program still expects them')
+
+analysis = Analysis(program, entry)
+if not args.quiet:
+    print('\n'.join(analysis.listing()))
+
+logging.info(f'{len(program)} cells: {len(analysis.code_cells)} code, {len(analysis.dead_cells())} dead')
+for writer, target in analysis.self_modifying_writes:
+    logging.info(f'Self-modifying write: {writer} overwrites the instruction at {target}')
+for address in analysis.dynamic_jumps:
+    logging.info(f'Jump at {address} has a target computed at run time')
+for address in sorted(analysis.invalid):
+    logging.info(f'Reached address {address}, which is not a valid instruction')
+
+if args.optimized:
+    optimized, reasons = analysis.optimize()
+    for reason in reasons:
+        logging.warning(f'Not optimizing: {reason}')
+    with open(args.optimized, 'w') as f:
+        f.write(','.join(map(str, optimized)) + '\n')
+    logging.info(f'Wrote {len(optimized)} cells to {args.optimized}')
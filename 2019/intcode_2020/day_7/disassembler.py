@@ -0,0 +1,316 @@
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional, Set, Tuple
+
+from intcodes import Computer
+
+
+# opcode: (mnemonic, number of value parameters, writes a result)
+OPCODES = {
+    1: ('add', 2, True),
+    2: ('mul', 2, True),
+    3: ('in', 0, True),
+    4: ('out', 1, False),
+    5: ('jt', 2, False),
+    6: ('jf', 2, False),
+    7: ('lt', 2, True),
+    8: ('eq', 2, True),
+    99: ('halt', 0, False)
+}
+
+POSITION = 0
+IMMEDIATE = 1
+
+
+@dataclass
+class Instruction:
+    address: int
+    opcode: int
+    modes: Tuple[int, ...]     # One per value parameter
+    operands: Tuple[int, ...]  # Raw cells following the opcode
+
+    @property
+    def length(self):
+        return 1 + len(self.operands)
+
+    @property
+    def cells(self):
+        return range(self.address, self.address + self.length)
+
+    @property
+    def mnemonic(self):
+        return OPCODES[self.opcode][0]
+
+    @property
+    def write_address(self) -> Optional[int]:
+        return self.operands[-1] if OPCODES[self.opcode][2] else None
+
+    @property
+    def reads(self) -> List[int]:
+        # Addresses read by position-mode value parameters
+        return [operand for mode, operand in zip(self.modes, self.operands) if mode == POSITION]
+
+    def encode(self) -> List[int]:
+        instruction = self.opcode
+        for index, mode in enumerate(self.modes):
+            instruction += mode * 10 ** (index + 2)
+        return [instruction, *self.operands]
+
+    def __str__(self):
+        params = [f'[{operand}]' if mode == POSITION else str(operand) for mode, operand in zip(self.modes, self.operands)]
+        if self.write_address is not None:
+            params.append(f'-> [{self.write_address}]')
+        return f'{self.mnemonic} {", ".join(params)}'.strip()
+
+
+def decode(program, address) -> Optional[Instruction]:
+    # None if the cell isn't a valid instruction in the current image
+    if not 0 <= address < len(program):
+        return None
+
+    opcode = program[address] % 100
+    if program[address] < 0 or opcode not in OPCODES:
+        return None
+
+    _, value_params, writes = OPCODES[opcode]
+    length = 1 + value_params + int(writes)
+    if address + length > len(program):
+        return None
+
+    modes = tuple(program[address] // 10 ** (index + 2) % 10 for index in range(value_params))
+    if any(mode not in (POSITION, IMMEDIATE) for mode in modes):
+        return None
+
+    return Instruction(address, opcode, modes, tuple(program[address + 1:address + length]))
+
+
+def specialize(program, inputs, max_steps=100000) -> Tuple[List[int], int, List[int]]:
+    # Run the program on inputs known ahead of time (e.g. a phase setting)
+    # up to the first instruction that needs anything else: a further input,
+    # an output or a halt. Returns (memory, address reached, known inputs
+    # left unread). Programs that patch themselves from their first inputs
+    # are usually closed from that point on, so they can be analysed from
+    # there (see Analysis.entry).
+    computer = Computer(list(program), inputs, trace=False)
+    for _ in range(max_steps):
+        opcode = computer.program[computer.inst] % 100
+        if opcode in (4, 99) or (opcode == 3 and not computer.queued_inputs):
+            break
+        computer.step()
+
+    return list(computer.program), computer.inst, list(computer.queued_inputs)
+
+
+@dataclass
+class Analysis:
+    '''Static analysis of an Intcode image, starting at entry.
+
+    Control flow is followed through every jump whose target can be read
+    from the image; everything reached is code, everything else is data.
+    The results only describe the running program if it is "closed": no
+    reachable instruction is overwritten and no jump target or write address
+    is computed at run time. unsafe_reasons() lists why a program is not.
+
+    Programs that patch their code from their input (both the day 5 and day
+    7 diagnostics do) are never closed from address 0. Running them past
+    the known inputs with specialize() and analysing from the address it
+    stops at (entry) usually gives a closed program for those inputs.
+    '''
+    program: List[int]
+    entry: int = 0
+
+    instructions: Dict[int, Instruction] = field(default_factory=dict)
+    invalid: Set[int] = field(default_factory=set)     # Reached, but not a valid instruction
+    reads: Set[int] = field(default_factory=set)       # Cells read as data
+    writes: Dict[int, List[int]] = field(default_factory=dict)  # Cell -> writing instructions
+
+    def __post_init__(self):
+        # Successors of an overwritten instruction are meaningless, so walk
+        # again without following them until the set stops changing
+        frozen = set()
+        while True:
+            self._walk(frozen)
+            overwritten = {target for _, target in self.self_modifying_writes}
+            if overwritten <= frozen:
+                break
+            frozen |= overwritten
+
+    def _walk(self, frozen):
+        self.instructions.clear()
+        self.invalid.clear()
+        self.reads.clear()
+        self.writes.clear()
+
+        pending = [self.entry]
+        while pending:
+            address = pending.pop()
+            if address in self.instructions or address in self.invalid:
+                continue
+
+            instruction = decode(self.program, address)
+            if instruction is None:
+                self.invalid.add(address)
+                continue
+            self.instructions[address] = instruction
+
+            self.reads.update(instruction.reads)
+            if instruction.write_address is not None:
+                self.writes.setdefault(instruction.write_address, []).append(address)
+
+            if instruction.opcode == 99 or address in frozen:
+                continue
+            if instruction.opcode in (5, 6):
+                target = self.jump_target(instruction)
+                if target is not None:
+                    pending.append(target)
+            pending.append(address + instruction.length)
+
+        self.code_cells = dict()  # Cell -> instructions covering it
+        for instruction in self.instructions.values():
+            for cell in instruction.cells:
+                self.code_cells.setdefault(cell, []).append(instruction.address)
+
+    def jump_target(self, instruction) -> Optional[int]:
+        # Target as found in the image; it may change at run time (see dynamic_jumps)
+        mode, operand = instruction.modes[1], instruction.operands[1]
+        if mode == IMMEDIATE:
+            return operand
+        if 0 <= operand < len(self.program):
+            return self.program[operand]
+        return None
+
+    @property
+    def self_modifying_writes(self) -> List[Tuple[int, int]]:
+        # (writer address, overwritten instruction address). Writes to a
+        # reached cell that isn't a valid instruction yet count too.
+        overwritten = []
+        for cell, writers in self.writes.items():
+            targets = self.code_cells.get(cell, [cell] if cell in self.invalid else [])
+            overwritten.extend((writer, target) for writer in writers for target in targets)
+        return sorted(overwritten)
+
+    @property
+    def dynamic_jumps(self) -> List[int]:
+        dynamic = []
+        for instruction in self.instructions.values():
+            if instruction.opcode in (5, 6):
+                target_cell = instruction.address + 2
+                if instruction.modes[1] == POSITION:
+                    target_cell = instruction.operands[1]
+                if target_cell in self.writes:
+                    dynamic.append(instruction.address)
+        return sorted(dynamic)
+
+    def unsafe_reasons(self) -> List[str]:
+        reasons = []
+        for writer, target in self.self_modifying_writes:
+            reasons.append(f'instruction at {writer} overwrites the instruction at {target}')
+        for address in self.dynamic_jumps:
+            reasons.append(f'jump at {address} has a target computed at run time')
+        return reasons
+
+    @property
+    def closed(self):
+        return not self.unsafe_reasons()
+
+    def dead_cells(self) -> Set[int]:
+        # Cells that are never executed, read or written. Unknowable unless
+        # the program is closed, in which case nothing is reported dead.
+        if not self.closed:
+            return set()
+        live = set(self.code_cells) | self.reads | set(self.writes) | self.invalid
+        return set(range(len(self.program))) - live
+
+    def listing(self) -> List[str]:
+        lines = []
+        dead = self.dead_cells()
+        overwritten = {target for _, target in self.self_modifying_writes}
+        dynamic = set(self.dynamic_jumps)
+
+        address = 0
+        while address < len(self.program):
+            instruction = self.instructions.get(address)
+            if instruction is not None:
+                notes = []
+                if address in overwritten:
+                    notes.append('overwritten at run time')
+                if address in dynamic:
+                    notes.append('dynamic target')
+                targets = sorted({target for writer, target in self.self_modifying_writes if writer == address})
+                if targets:
+                    notes.append(f'writes code at {", ".join(map(str, targets))}')
+
+                line = f'{address:>6}: {str(instruction):<36}'
+                if notes:
+                    line += f' ; {"; ".join(notes)}'
+                lines.append(line.rstrip())
+                address += instruction.length
+                continue
+
+            # Control flow couldn't be followed everywhere, so fall back to a
+            # linear sweep: show what the cells would decode to, marked with '?'
+            guess = None if self.closed else decode(self.program, address)
+            if guess is not None and not any(cell in self.code_cells for cell in guess.cells):
+                lines.append(f'{address:>6}: ? {guess}')
+                address += guess.length
+                continue
+
+            # Group consecutive data cells (up to 8 per line)
+            start = address
+            while address < len(self.program) and address not in self.instructions and address - start < 8:
+                address += 1
+                if not self.closed and decode(self.program, address) is not None:
+                    break
+            label = 'dead' if all(cell in dead for cell in range(start, address)) else 'data'
+            lines.append(f'{start:>6}: {label} {", ".join(map(str, self.program[start:address]))}')
+
+        return lines
+
+    def optimize(self) -> Tuple[List[int], List[str]]:
+        # Returns (optimized program, reasons it could not be optimized).
+        # Only closed programs are rewritten; others are returned unchanged.
+        reasons = self.unsafe_reasons()
+        if reasons:
+            return list(self.program), reasons
+
+        optimized = list(self.program)
+        for instruction in self.instructions.values():
+            # Leave instructions that overlap another one or are read as data
+            if any(len(self.code_cells[cell]) > 1 or cell in self.reads for cell in instruction.cells):
+                continue
+
+            # Constant propagation: cells nothing writes to keep their image value
+            modes = list(instruction.modes)
+            operands = list(instruction.operands)
+            for index, mode in enumerate(modes):
+                if mode == POSITION and operands[index] not in self.writes:
+                    modes[index] = IMMEDIATE
+                    operands[index] = self.program[operands[index]]
+
+            # Constant folding: immediate-only arithmetic becomes a move (add value, 0)
+            if instruction.opcode in (1, 2, 7, 8) and all(mode == IMMEDIATE for mode in modes):
+                a, b = operands[0], operands[1]
+                value = {1: a + b, 2: a * b, 7: int(a < b), 8: int(a == b)}[instruction.opcode]
+                folded = Instruction(instruction.address, 1, (IMMEDIATE, IMMEDIATE), (value, 0, operands[2]))
+            else:
+                folded = Instruction(instruction.address, instruction.opcode, tuple(modes), tuple(operands))
+
+            optimized[folded.address:folded.address + folded.length] = folded.encode()
+
+        # Reads promoted to immediates may have left more cells unused
+        dead = Analysis(optimized, self.entry).dead_cells()
+
+        # A specialized program resumes part-way through, so start it with a
+        # jump there. The cells it was specialized past are usually dead.
+        if self.entry:
+            if not dead.issuperset(range(3)):
+                return list(self.program), [f'no dead cells at address 0 for a jump to the entry point at {self.entry}']
+            optimized[0:3] = Instruction(0, 5, (IMMEDIATE, IMMEDIATE), (1, self.entry)).encode()
+            dead -= set(range(3))
+
+        for cell in dead:
+            optimized[cell] = 0
+        while optimized and len(optimized) - 1 in dead:
+            dead.discard(len(optimized) - 1)
+            optimized.pop()
+
+        return optimized, []
@@ -1,16 +1,72 @@
+import logging
+
+from collections import deque
 from dataclasses import dataclass
-from typing import List, Optional
+from enum import Enum
+from functools import wraps
+from typing import Iterable, List, Optional, Union
+
+from checkpoint import Checkpointer
+from compiler import HALT, BlockCompiler
+from cycles import SpinWatch
+from memory import PagedMemory
+from profiler import Profiler
+from tracer import TraceRecorder
+
+
+class Status(Enum):
+    HALTED = 0
+    NEEDS_INPUT = 1
+    OUTPUT = 2
+    PAUSED = 3  # Used up the step budget given to resume()
+
+
+def trace_opcodes(machine, opcode_map):
+    # Wrap every handler to log each instruction before it runs. Only traced
+    # machines pay for this; the plain handlers never touch logging.
+    def wrap(opcode, handler):
+        @wraps(handler)
+        def traced(mode):
+            logging.debug(f'{handler.__name__} @ {machine.inst}')
+            if opcode == 3 and machine.queued_inputs:
+                logging.debug(f'Reading input, got: {machine.queued_inputs[0]}')
+            return handler(mode)
+        return traced
+
+    return {opcode: wrap(opcode, handler) for opcode, handler in opcode_map.items()}
 
 
 @dataclass
 class Computer:
-    program: List[int]
-    queued_inputs: Optional[List[int]]
+    program: Union[List[int], PagedMemory]
+    queued_inputs: Optional[Iterable[int]]  # Read first to last
     interactive: bool = False
+    cache_instructions: bool = False
+    profiler: Optional[Profiler] = None
+    tracer: Optional[TraceRecorder] = None
+    paged_memory: bool = False
+    checkpointer: Optional[Checkpointer] = None
+    trace: Optional[bool] = None  # Log every instruction; defaults to whether DEBUG logging is on
+    spin_watch: Optional[SpinWatch] = None
 
     def __post_init__(self):
         self.reset_registers()
 
+        # Fixed here so the untraced hot loop never checks the log level
+        if self.trace is None:
+            self.trace = logging.getLogger().isEnabledFor(logging.DEBUG)
+
+        if self.paged_memory and not isinstance(self.program, PagedMemory):
+            self.program = PagedMemory(self.program)
+
+        self.queued_inputs = deque(self.queued_inputs or ())
+        self.output = None  # Value produced by the last resume() returning Status.OUTPUT
+
+        # Decoded (function, mode) pairs keyed by instruction address. Entries
+        # are dropped by write() so self-modifying programs stay correct.
+        self.decoded_cache = dict() if self.cache_instructions else None
+        self.block_compiler = None
+
         if self.interactive:
             self.opcode_map = {
                 1: self._add,
@@ -34,11 +90,33 @@ class Computer:
                 8: self._equals
             }
 
+        if self.trace:
+            self.opcode_map = trace_opcodes(self, self.opcode_map)
+        if self.profiler is not None:
+            self.opcode_map = self.profiler.instrument(self, self.opcode_map)
+        if self.tracer is not None:
+            self.opcode_map = self.tracer.instrument(self, self.opcode_map)
+        if self.checkpointer is not None:
+            self.opcode_map = self.checkpointer.instrument(self, self.opcode_map)
+        if self.spin_watch is not None:
+            self.opcode_map = self.spin_watch.instrument(self, self.opcode_map)
+
     def copy(self):
-        return Computer(self.program.copy())
+        return Computer(
+            self.program.copy(),
+            self.queued_inputs.copy(),
+            self.interactive,
+            self.cache_instructions,
+            self.profiler,
+            paged_memory=self.paged_memory,
+            trace=self.trace
+        )
 
     def enqueue_input(self, value):
-        self.queued_inputs.insert(0, value)
+        self.queued_inputs.append(value)
+
+    def feed(self, values: Iterable[int]):
+        self.queued_inputs.extend(values)
 
     def reset_registers(self):
         self.inst = 0
@@ -49,22 +127,112 @@ class Computer:
     def write(self, program_index, value):
         self.program[program_index] = value
 
+        if self.decoded_cache is not None:
+            self.decoded_cache.pop(program_index, None)
+        if self.block_compiler is not None:
+            self.block_compiler.invalidate(program_index)
+
     def run(self):
         while self.program[self.inst] % 100 != 99:
             output = self.step()
             if output is not None:
                 yield output
-        import logging
         logging.debug('all done!')
 
-    def step(self):
+        if self.profiler is not None:
+            self.profiler.halted()
+
+    def resume(self, budget: Optional[int] = None) -> Status:
+        # Run until the program halts, reads from an empty input queue or
+        # produces an output (stored in self.output). Can be called again
+        # after feeding input to pick up where it stopped. With a budget, it
+        # also stops (Status.PAUSED) after that many steps, so a caller
+        # sharing a thread can get a word in while a machine computes.
+        program = self.program
+        interactive = self.interactive
+        remaining = budget if budget is not None else -1  # Never reaches 0
+        while True:
+            if remaining == 0:
+                return Status.PAUSED
+            remaining -= 1
+
+            opcode = program[self.inst] % 100
+            if opcode == 99:
+                if self.profiler is not None:
+                    self.profiler.halted()
+                return Status.HALTED
+            if opcode == 3 and not self.queued_inputs and not interactive:
+                return Status.NEEDS_INPUT
+
+            output = self.step()
+            if output is not None:
+                self.output = output
+                return Status.OUTPUT
+
+    def run_compiled(self):
+        # Same contract as run(), but executes hot basic blocks compiled to
+        # Python functions instead of dispatching one instruction at a time.
+        # Blocks entered fewer than hot_threshold times are interpreted.
+        if self.interactive:
+            raise ValueError('Compiled execution does not support interactive mode')
+        # Compiled blocks bypass opcode_map, so these would silently miss
+        # everything the compiled code runs
+        for name in ('profiler', 'tracer', 'checkpointer', 'spin_watch'):
+            if getattr(self, name) is not None:
+                raise ValueError(f'Compiled execution does not support {name}')
+        if self.block_compiler is None:
+            self.block_compiler = BlockCompiler(self.program)
+
+        program = self.program
+        inputs = self.queued_inputs
+        code_refs = self.block_compiler.code_refs
+        invalidate = self.block_compiler.invalidate
+        blocks = self.block_compiler.blocks
+        is_hot = self.block_compiler.is_hot
+        compile_block = self.block_compiler.compile_block
+
+        while True:
+            block = blocks.get(self.inst)
+            if block is not None:
+                self.inst, output = block.function(program, inputs, code_refs, invalidate)
+            elif is_hot(self.inst):
+                self.inst, output = compile_block(self.inst).function(program, inputs, code_refs, invalidate)
+            else:
+                output = self.interpret_block()
+
+            if output is not None:
+                if output is HALT:
+                    break
+                yield output
+
+    def interpret_block(self):
+        # Step up to and including the next input, output or jump, returning
+        # any output (HALT if the program halts first)
+        program = self.program
+        while True:
+            opcode = program[self.inst] % 100
+            if opcode == 99:
+                return HALT
+            output = self.step()
+            if opcode in (3, 4, 5, 6):
+                return output
+
+    def decode(self, program_index):
         # Look up function name via opcode_map
-        opcode = self.program[self.inst] % 100
-        mode = int(str(int(self.program[self.inst] / 100)), 2)
+        opcode = self.program[program_index] % 100
+        mode = int(str(int(self.program[program_index] / 100)), 2)
+
+        return self.opcode_map[opcode], mode
+
+    def step(self):
+        if self.decoded_cache is None:
+            func, mode = self.decode(self.inst)
+        else:
+            try:
+                func, mode = self.decoded_cache[self.inst]
+            except KeyError:
+                func, mode = self.decoded_cache[self.inst] = self.decode(self.inst)
 
-        func = self.opcode_map[opcode]
-        import logging
-        logging.debug(f'{func.__name__} @ {self.inst}')
         return func(mode)
 
     # Opcode Functions
@@ -86,7 +254,7 @@ class Computer:
         dest_index = self.program[self.inst + 3]
 
         # Execute function
-        self.program[dest_index] = var1 + var2
+        self.write(dest_index, var1 + var2)
 
         self.inst += 4
 
@@ -107,7 +275,7 @@ class Computer:
         dest_index = self.program[self.inst + 3]
 
         # Execute function
-        self.program[dest_index] = var1 * var2
+        self.write(dest_index, var1 * var2)
 
         self.inst += 4
 
@@ -116,9 +284,7 @@ class Computer:
         dest_index = self.program[self.inst + 1]
 
         # Execute function
-        import logging
-        logging.debug(f'Reading input, got: {self.queued_inputs[-1]}')
-        self.program[dest_index] = self.queued_inputs.pop()
+        self.write(dest_index, self.queued_inputs.popleft())
 
         self.inst += 2
 
@@ -140,7 +306,7 @@ class Computer:
         dest_index = self.program[self.inst + 1]
 
         # Execute function
-        self.program[dest_index] = int(input('Gimme a number!'))
+        self.write(dest_index, int(input('Gimme a number!')))
 
         self.inst += 2
 
@@ -215,9 +381,9 @@ class Computer:
 
         # Execute function
         if var1 < var2:
-            self.program[dest_index] = 1
+            self.write(dest_index, 1)
         else:
-            self.program[dest_index] = 0
+            self.write(dest_index, 0)
 
         self.inst += 4
 
@@ -239,8 +405,8 @@ class Computer:
 
         # Execute function
         if var1 == var2:
-            self.program[dest_index] = 1
+            self.write(dest_index, 1)
         else:
-            self.program[dest_index] = 0
+            self.write(dest_index, 0)
 
         self.inst += 4
@@ -0,0 +1,71 @@
+import mmap
+import os
+
+from array import array
+from typing import List, Union
+
+
+# Bytes of the file parsed per step; only this much text is copied at a time
+CHUNK_SIZE = 1 << 20
+
+
+class Int64Memory(array):
+    '''array('q') with list's copy(), so engines can use it in place of a list.
+
+    Cells take 8 bytes instead of a pointer to an int object each. Writing a
+    value that doesn't fit in an int64 raises OverflowError.
+    '''
+    def __new__(cls, values=()):
+        return super().__new__(cls, 'q', values)
+
+    def copy(self):
+        return Int64Memory(self)
+
+
+def parse_ints(buffer, memory_type=list, chunk_size=CHUNK_SIZE) -> Union[List[int], Int64Memory]:
+    # Parse comma-separated integers from a bytes-like buffer (e.g. an mmap)
+    # a chunk at a time, cutting each chunk at its last comma, into a new
+    # memory_type (list or Int64Memory)
+    memory = memory_type()
+    total = len(buffer)
+
+    start = 0
+    while start < total:
+        end = next_start = total
+        if start + chunk_size < total:
+            comma = buffer.rfind(b',', start, start + chunk_size)
+            if comma == -1:  # A single number longer than the chunk
+                comma = buffer.find(b',', start + chunk_size)
+            if comma != -1:
+                end, next_start = comma, comma + 1
+
+        piece = buffer[start:end]
+        if piece.strip():
+            memory.extend(map(int, piece.split(b',')))
+        start = next_start
+
+    return memory
+
+
+def load_program(path, int64=False, numpy=False):
+    '''Load a comma-separated Intcode program.
+
+    The file is memory-mapped and parsed a chunk at a time, so no string
+    list the size of the file is ever built. The result is a list, which
+    holds values of any size. With int64=True it is an Int64Memory instead,
+    which takes 8 bytes per cell but raises OverflowError on writing
+    anything that doesn't fit in an int64. With numpy=True it is an int64
+    ndarray viewing that buffer, without a copy.
+    '''
+    memory_type = Int64Memory if int64 or numpy else list
+    with open(path, 'rb') as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            memory = memory_type()
+        else:
+            with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                memory = parse_ints(mapped, memory_type)
+
+    if numpy:
+        import numpy as np
+        return np.frombuffer(memory, dtype=np.int64)
+    return memory
@@ -1,89 +1,180 @@
 import argparse
+import asyncio
 import logging
+import time
 
+from functools import lru_cache
 from itertools import permutations
 
-from intcodes import Computer
+from cycles import CycleDetected
+from intcodes import Computer, Status
+from loader import load_program
+from network import Network
+from profiler import Profiler
+from result_cache import ResultCache
 
 # Parse Arguments
 
 parser = argparse.ArgumentParser()
 parser.add_argument('input_file', help='input file to read')
+parser.add_argument('--amplifiers', type=int, default=5, help='number of amplifiers in the basic circuit')
+parser.add_argument('--phase-count', type=int, default=5, help='basic circuit phases are drawn from range(phase_count)')
+parser.add_argument('--batch', action='store_true', help='run every basic circuit phase setting in lockstep (requires numpy)')
+parser.add_argument('--cache-dir', help='memoize basic circuit amplifier runs in this directory')
+parser.add_argument('--cache-size', type=int, default=64, help='result cache size limit in MiB')
+parser.add_argument('--detect-cycles', action='store_true', help='skip looping circuit phase settings whose state repeats instead of hanging')
+parser.add_argument('--int64', action='store_true', help='hold program memory in an int64 array (smaller, but values must fit in 64 bits)')
+parser.add_argument('--profile', help='write an opcode/address profile to PROFILE.txt and PROFILE.json')
 parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
 args = parser.parse_args()
 
+if args.amplifiers > args.phase_count:
+    parser.error('--amplifiers can be at most --phase-count, since each amplifier needs its own phase')
+
 verbosity = 'INFO'
 if args.verbosity:
     verbosity = args.verbosity
 logging.getLogger().setLevel(logging.getLevelName(verbosity))
 
+profiler = Profiler(args.profile) if args.profile else None
+result_cache = ResultCache(args.cache_dir, args.cache_size << 20) if args.cache_dir else None
+
 
 # Helper functions
 
-def basic_circuit(program):
-    best_output = -1
-    best_setting = -1
-    for phase_setting in permutations(range(5)):
-        prev_output = 0
-        for setting in phase_setting:
-            inputs = [prev_output, setting]
-
-            parser = Computer(program, inputs)
-            prev_output = next(parser.run(), None)
-
-        if prev_output > best_output:
-            phase_str = ''.join(map(str, phase_setting))
-            logging.debug(f' >> {phase_str, prev_output}')
-            best_output = prev_output
-            best_setting = phase_str
+def amplify(program, phase, signal):
+    if result_cache is not None:
+        # Basic circuit amplifiers halt after their one output, so the whole run can be cached
+        outputs = result_cache.run(program, [phase, signal], profiler=profiler).outputs
+        return outputs[0] if outputs else None
+
+    computer = Computer(program.copy(), [phase, signal], profiler=profiler)
+    if computer.resume() is Status.OUTPUT:
+        return computer.output
+    return None
+
+
+def search_phases(program, phases, amplifiers):
+    # Depth-first search over phase orderings. An amplifier's output only
+    # depends on its (phase, input signal), and the best way to finish a chain
+    # only on (unused phases, stages left, signal), so both are memoized and
+    # orderings that share a prefix reuse its work instead of rerunning it.
+    @lru_cache(maxsize=None)
+    def stage_output(phase, signal):
+        return amplify(program, phase, signal)
+
+    @lru_cache(maxsize=None)
+    def best_suffix(unused, stages_left, signal):
+        if stages_left == 0:
+            return signal, ()
+
+        best_output = best_setting = None
+        for phase in sorted(unused):
+            phase_output = stage_output(phase, signal)
+            if phase_output is None:
+                continue  # Halted without an output
+            output, setting = best_suffix(unused - {phase}, stages_left - 1, phase_output)
+            if setting is None:
+                continue  # No way to finish the chain from here
+            if best_output is None or output > best_output:
+                best_output = output
+                best_setting = (phase,) + setting
+
+        return best_output, best_setting
+
+    return best_suffix(frozenset(phases), amplifiers, 0)
+
+
+def batch_search_phases(program, phases, amplifiers):
+    # Exhaustive alternative to search_phases: one lane per phase setting,
+    # one lockstep batch per amplifier stage
+    from batch import BatchComputer
+
+    settings = sorted(permutations(phases, amplifiers))
+    signals = [0] * len(settings)
+    for stage in range(amplifiers):
+        batch = BatchComputer(program, [[setting[stage], signal] for setting, signal in zip(settings, signals)])
+        # Lanes that halt without an output can't finish the chain, as in search_phases
+        survivors = [(setting, outputs[0]) for setting, outputs in zip(settings, batch.run()) if outputs]
+        settings = [setting for setting, _ in survivors]
+        signals = [signal for _, signal in survivors]
+
+    if not settings:
+        return None, None
+
+    # First best in sorted order, so ties go to the same setting search_phases picks
+    best_output, best_setting = max(zip(signals, settings), key=lambda pair: pair[0])
+    return best_output, best_setting
+
+
+def format_setting(setting, phase_count):
+    # Digits run together as in the puzzle, unless a phase can take two
+    separator = ',' if phase_count > 10 else ''
+    return separator.join(map(str, setting))
+
+
+def basic_circuit(program, phase_count=5, amplifiers=5, batch=False):
+    search = batch_search_phases if batch else search_phases
+    best_output, best_setting = search(program, range(phase_count), amplifiers)
+    phase_str = format_setting(best_setting, phase_count)
 
     logging.info(f'Best Output: {best_output}')
-    logging.info(f'Best Phase Setting: {best_setting}')
+    logging.info(f'Best Phase Setting: {phase_str}')
 
 
-def looping_circuit(program):
-    best_output = -1
-    best_setting = -1
-    for phase_setting in permutations(range(5, 10)):
-        phase_setting = [9, 8, 7, 6, 5]
-        # Build Circuit
-        circuit = [Computer(program, [setting]) for setting in phase_setting]
+def looping_circuit(program, detect_cycles=False):
+    # Feedback ring A -> B -> C -> D -> E -> A, one network per phase setting,
+    # all running concurrently on one event loop
+    names = 'ABCDE'
+    ring = {name: [names[(index + 1) % len(names)]] for index, name in enumerate(names)}
 
-        # Loop through circuit until it stops
-        prev_output = 0
-        while True:
-            for index, computer in enumerate(circuit):
-                computer.enqueue_input(prev_output)
-                logging.debug(f'P[{index}] inputs: {computer.queued_inputs}')
+    networks = dict()
+    for phase_setting in permutations(range(5, 10)):
+        initial_inputs = {name: [setting] for name, setting in zip(names, phase_setting)}
+        initial_inputs[names[0]].append(0)
 
-                prev_output = next(computer.run(), None)
-                logging.debug(f'output: {prev_output}')
-                if prev_output is None:
-                    break
+        phase_str = ''.join(map(str, phase_setting))
+        networks[phase_str] = Network(program, ring, initial_inputs, profiler, detect_cycles)
 
-            if prev_output is None:
-                break
+    async def run_all():
+        return await asyncio.gather(*(network.run() for network in networks.values()), return_exceptions=True)
 
-            if prev_output > best_output:
-                phase_str = ''.join(map(str, phase_setting))
-                logging.debug(f' >> {phase_str, prev_output}')
-                best_output = prev_output
-                best_setting = phase_str
+    start = time.perf_counter()
+    all_outputs = asyncio.run(run_all())
+    elapsed = time.perf_counter() - start
 
-        break
+    best_output = -1
+    best_setting = -1
+    for phase_str, outputs in zip(networks, all_outputs):
+        if isinstance(outputs, CycleDetected):
+            logging.warning(f'Phase setting {phase_str} never halts: {outputs}')
+            continue
+        if isinstance(outputs, BaseException):
+            raise outputs
+
+        final_output = outputs[names[-1]][-1]
+        if final_output > best_output:
+            logging.debug(f' >> {phase_str, final_output}')
+            best_output = final_output
+            best_setting = phase_str
 
+    messages = sum(network.messages for network in networks.values())
     logging.info(f'Best Output: {best_output}')
     logging.info(f'Best Phase Setting: {best_setting}')
+    logging.info(f'Messages: {messages} in {elapsed:.3f}s ({messages / elapsed:.0f}/s)')
 
 
 # Load Inputs
 
-input_file = args.input_file
-with open(input_file) as f:
-    values = f.read().split(',')
-    program = list(map(int, values))
+program = load_program(args.input_file, int64=args.int64)
 
 # Main Logic
 
-basic_circuit(program)
-looping_circuit(program)
+basic_circuit(program, args.phase_count, args.amplifiers, args.batch)
+if result_cache is not None:
+    logging.info(f'Result cache: {result_cache.hits} hits, {result_cache.misses} misses')
+looping_circuit(program, args.detect_cycles)
+
+if profiler is not None:
+    profiler.finish()
+    logging.info(f'Profile:\n{profiler.text_report()}')
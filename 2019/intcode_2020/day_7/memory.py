@@ -0,0 +1,111 @@
+from array import array
+from typing import Dict, Iterable, List, Optional
+
+
+PAGE_BITS = 10
+PAGE_SIZE = 1 << PAGE_BITS
+PAGE_MASK = PAGE_SIZE - 1
+
+# Pages below this number (or covering the loaded image, if larger) are kept
+# in a list; anything higher lives in a dict so far-away addresses stay cheap
+DENSE_PAGES = 64
+
+
+class PagedMemory:
+    '''Growable Intcode memory made of fixed-size array('q') pages.
+
+    Pages are allocated the first time they are written; reads from
+    untouched memory return 0. Writing past the loaded image works and
+    extends len() to the highest address written. Values must fit in an
+    int64.
+    '''
+
+    def __init__(self, image: Iterable[int] = ()):
+        image = array('q', image)
+        self.length = len(image)
+
+        image_pages = (self.length + PAGE_MASK) >> PAGE_BITS
+        self.pages: List[Optional[array]] = [None] * max(DENSE_PAGES, image_pages)
+        self.sparse_pages: Dict[int, array] = dict()
+
+        for page_number in range(image_pages):
+            page = image[page_number << PAGE_BITS:(page_number + 1) << PAGE_BITS]
+            page.frombytes(bytes(8 * (PAGE_SIZE - len(page))))
+            self.pages[page_number] = page
+
+    def _page(self, page_number) -> Optional[array]:
+        if page_number < len(self.pages):
+            return self.pages[page_number]
+        return self.sparse_pages.get(page_number)
+
+    def _new_page(self, page_number) -> array:
+        page = array('q', bytes(8 * PAGE_SIZE))
+        if page_number < len(self.pages):
+            self.pages[page_number] = page
+        else:
+            self.sparse_pages[page_number] = page
+        return page
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return [self[i] for i in range(*index.indices(self.length))]
+        if index < 0:
+            raise IndexError(f'Negative address {index}')
+
+        page = self._page(index >> PAGE_BITS)
+        if page is None:
+            return 0
+        return page[index & PAGE_MASK]
+
+    def __setitem__(self, index, value):
+        if index < 0:
+            raise IndexError(f'Negative address {index}')
+
+        page_number = index >> PAGE_BITS
+        page = self._page(page_number)
+        if page is None:
+            page = self._new_page(page_number)
+        page[index & PAGE_MASK] = value
+
+        if index >= self.length:
+            self.length = index + 1
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for index in range(self.length):
+            yield self[index]
+
+    def __repr__(self):
+        return f'PagedMemory({list(self)})'
+
+    def page_table(self):
+        # (page number, page) for every allocated page, in address order
+        for page_number, page in enumerate(self.pages):
+            if page is not None:
+                yield page_number, page
+        yield from sorted(self.sparse_pages.items())
+
+    @classmethod
+    def from_pages(cls, length, page_table: Iterable):
+        # Inverse of page_table(); the pages are adopted, not copied
+        memory = cls()
+        memory.length = length
+        for page_number, page in page_table:
+            if page_number < len(memory.pages):
+                memory.pages[page_number] = page
+            else:
+                memory.sparse_pages[page_number] = page
+        return memory
+
+    @property
+    def allocated_pages(self):
+        return sum(page is not None for page in self.pages) + len(self.sparse_pages)
+
+    def copy(self):
+        memory = PagedMemory()
+        memory.length = self.length
+        memory.pages = [page if page is None else array('q', page) for page in self.pages]
+        memory.sparse_pages = {page_number: array('q', page) for page_number, page in self.sparse_pages.items()}
+        return memory
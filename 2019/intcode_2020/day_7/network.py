@@ -0,0 +1,122 @@
+import asyncio
+
+from dataclasses import dataclass, field
+from typing import Dict, List, Optional
+
+from cycles import CycleDetector, HashedMemory, SpinWatch
+from intcodes import Computer, Status
+from profiler import Profiler
+
+
+def machine_state(computer: Computer):
+    return computer.inst, computer.program.snapshot(), tuple(computer.queued_inputs)
+
+
+def describe_machine(computer: Computer):
+    return f'instruction {computer.inst}, pending inputs {list(computer.queued_inputs)}'
+
+
+@dataclass
+class Node:
+    name: str
+    computer: Computer
+    inbox: asyncio.Queue = field(default_factory=asyncio.Queue)
+    outputs: List[int] = field(default_factory=list)
+    halted: bool = False
+
+
+@dataclass
+class Network:
+    '''Runs one Computer per node, connected by asyncio queues.
+
+    topology maps each node name to the nodes that receive its outputs, so a
+    ring is {'A': ['B'], 'B': ['A']} and fan-out is {'A': ['B', 'C'], ...}.
+    initial_inputs are queued on each node before anything runs.
+
+    With detect_cycles, the whole network state (every instruction pointer,
+    memory and queued value) is recorded each time a node blocks for input,
+    and CycleDetected is raised as soon as one repeats. Each node also gets a
+    SpinWatch for loops that never block, and runs at most step_budget steps
+    before yielding to the event loop, so a node stuck computing can't stall
+    every other network sharing it.
+    '''
+    program: List[int]
+    topology: Dict[str, List[str]]
+    initial_inputs: Dict[str, List[int]] = field(default_factory=dict)
+    profiler: Optional[Profiler] = None
+    detect_cycles: bool = False
+    step_budget: int = 100000
+
+    def __post_init__(self):
+        self.nodes = dict()
+        for name in self.topology:
+            if self.detect_cycles:
+                computer = Computer(
+                    HashedMemory(self.program),
+                    self.initial_inputs.get(name),
+                    profiler=self.profiler,
+                    spin_watch=SpinWatch(machine_state, lambda computer, name=name: f'{name} at {describe_machine(computer)}')
+                )
+            else:
+                computer = Computer(self.program.copy(), self.initial_inputs.get(name), profiler=self.profiler)
+            self.nodes[name] = Node(name, computer)
+
+        self.messages = 0
+        self.waiting = 0
+        self.cycle_detector = CycleDetector() if self.detect_cycles else None
+
+    async def run(self) -> Dict[str, List[int]]:
+        await asyncio.gather(*(self._run_node(node) for node in self.nodes.values()))
+        return {name: node.outputs for name, node in self.nodes.items()}
+
+    def _state(self, blocked: Node):
+        # Everything the network's future depends on. asyncio.Queue has no
+        # public way to peek, so queued messages are read from its deque.
+        return blocked.name, tuple(
+            (machine_state(node.computer), tuple(node.inbox._queue), node.halted)
+            for node in self.nodes.values()
+        )
+
+    def _describe_state(self):
+        return ', '.join(
+            f'{node.name}@{node.computer.inst} inbox={list(node.inbox._queue)}{" (halted)" if node.halted else ""}'
+            for node in self.nodes.values()
+        )
+
+    def _deadlocked(self):
+        running = sum(not node.halted for node in self.nodes.values())
+        queued = sum(node.inbox.qsize() for node in self.nodes.values())
+        return self.waiting == running and queued == 0
+
+    async def _run_node(self, node: Node):
+        computer = node.computer
+        targets = [self.nodes[name] for name in self.topology[node.name]]
+
+        budget = self.step_budget if self.detect_cycles else None
+
+        status = computer.resume(budget)
+        while status is not Status.HALTED:
+            if status is Status.PAUSED:
+                # Let the other nodes (and networks) run for a while
+                await asyncio.sleep(0)
+            elif status is Status.NEEDS_INPUT:
+                if self.cycle_detector is not None:
+                    self.cycle_detector.check(self._state(node), self._describe_state)
+
+                # Block until a neighbour sends something
+                self.waiting += 1
+                if self._deadlocked():
+                    raise RuntimeError(f'Network deadlocked waiting on {node.name}')
+                computer.enqueue_input(await node.inbox.get())
+                self.waiting -= 1
+            else:
+                node.outputs.append(computer.output)
+                for target in targets:
+                    self.messages += 1
+                    target.inbox.put_nowait(computer.output)
+
+            status = computer.resume(budget)
+
+        node.halted = True
+        if self._deadlocked() and self.waiting:
+            raise RuntimeError(f'Network deadlocked after {node.name} halted')
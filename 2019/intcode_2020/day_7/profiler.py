@@ -0,0 +1,121 @@
+# Source of the copies in day_5/profiler.py and day_7/profiler.py; copy any
+# change made here over to them.
+
+import json
+import time
+
+from collections import Counter
+from dataclasses import dataclass, field
+from functools import wraps
+from typing import Dict, Optional
+
+
+OPCODE_NAMES = {
+    1: 'add',
+    2: 'mul',
+    3: 'input',
+    4: 'output',
+    5: 'jump_if_true',
+    6: 'jump_if_false',
+    7: 'less_than',
+    8: 'equals'
+}
+
+# Jump instructions occupy 3 cells; landing anywhere else means the branch was taken
+JUMP_LENGTH = 3
+
+
+@dataclass
+class Profiler:
+    '''Counts executions per opcode and per address.
+
+    A machine opts in by passing its opcode map through instrument(), which
+    wraps every handler; machines without a profiler keep their plain
+    handlers and pay nothing. Machines call halted() as they stop, which
+    only notes the time; the driver calls finish() once at the end, which
+    writes <report_prefix>.txt and <report_prefix>.json if report_prefix is
+    set.
+    '''
+    report_prefix: Optional[str] = None
+    hot_addresses: int = 10
+
+    opcode_counts: Counter = field(default_factory=Counter)
+    address_counts: Counter = field(default_factory=Counter)
+    branches: int = 0
+    branches_taken: int = 0
+    start_time: Optional[float] = None
+    end_time: Optional[float] = None
+
+    def instrument(self, machine, opcode_map) -> Dict:
+        # machine must expose the instruction pointer as machine.inst
+        def wrap(opcode, handler):
+            @wraps(handler)
+            def profiled(mode):
+                address = machine.inst
+                output = handler(mode)
+                self.record(opcode, address, machine.inst)
+                return output
+            return profiled
+
+        return {opcode: wrap(opcode, handler) for opcode, handler in opcode_map.items()}
+
+    def record(self, opcode, address, next_inst):
+        if self.start_time is None:
+            self.start_time = time.perf_counter()
+
+        self.opcode_counts[opcode] += 1
+        self.address_counts[address] += 1
+        if opcode in (5, 6):
+            self.branches += 1
+            if next_inst != address + JUMP_LENGTH:
+                self.branches_taken += 1
+
+    @property
+    def instructions(self):
+        return sum(self.opcode_counts.values())
+
+    def halted(self):
+        # Called when a profiled machine halts
+        self.end_time = time.perf_counter()
+
+    def finish(self):
+        # Called once after the last machine sharing this profiler is done;
+        # reports are cumulative over all of them
+        if self.end_time is None:
+            self.end_time = time.perf_counter()
+        if self.report_prefix is not None:
+            with open(f'{self.report_prefix}.txt', 'w') as f:
+                f.write(self.text_report() + '\n')
+            with open(f'{self.report_prefix}.json', 'w') as f:
+                json.dump(self.json_report(), f, indent=2)
+
+    def json_report(self) -> Dict:
+        elapsed = (self.end_time or time.perf_counter()) - (self.start_time or 0)
+        return {
+            'instructions': self.instructions,
+            'seconds': elapsed,
+            'instructions_per_second': self.instructions / elapsed if elapsed > 0 else None,
+            'branches': self.branches,
+            'branches_taken': self.branches_taken,
+            'opcodes': {OPCODE_NAMES.get(opcode, str(opcode)): count for opcode, count in self.opcode_counts.most_common()},
+            'addresses': {str(address): count for address, count in self.address_counts.most_common()}
+        }
+
+    def text_report(self) -> str:
+        report = self.json_report()
+        total = max(1, report['instructions'])
+
+        lines = [f'Instructions: {report["instructions"]} in {report["seconds"]:.3f}s']
+        if report['instructions_per_second'] is not None:
+            lines[0] += f' ({report["instructions_per_second"]:.0f}/s)'
+        lines.append(f'Branches taken: {report["branches_taken"]} of {report["branches"]}')
+
+        lines.append('Opcodes:')
+        for name, count in report['opcodes'].items():
+            lines.append(f'  {name:<14} {count:>10} {100 * count / total:6.2f}%')
+
+        lines.append(f'Hot addresses (top {self.hot_addresses}):')
+        for address, count in self.address_counts.most_common(self.hot_addresses):
+            lines.append(f'  {address:>6} {count:>10} {100 * count / total:6.2f}%')
+
+        return '\n'.join(lines)
@@ -0,0 +1,58 @@
+import argparse
+import logging
+
+from intcodes import Computer
+from loader import load_program
+from tracer import TraceRecorder, load_trace
+
+# Parse Arguments
+
+parser = argparse.ArgumentParser()
+subparsers = parser.add_subparsers(dest='command', required=True)
+
+record_parser = subparsers.add_parser('record', help='run a program and save its execution trace')
+record_parser.add_argument('input_file', help='program file to run')
+record_parser.add_argument('trace_file', help='trace file to write')
+record_parser.add_argument('--inputs', default='', help='comma-separated values fed to the program, in order')
+record_parser.add_argument('--capacity', type=int, default=1 << 16, help='number of most recent steps to keep')
+
+show_parser = subparsers.add_parser('show', help='print recorded steps and rebuild memory from a trace')
+show_parser.add_argument('trace_file', help='trace file to read')
+show_parser.add_argument('--step', type=int, help='print memory as it was just before this step')
+show_parser.add_argument('--last', type=int, default=20, help='number of trailing steps to list')
+
+parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
+args = parser.parse_args()
+
+verbosity = 'INFO'
+if args.verbosity:
+    verbosity = args.verbosity
+logging.getLogger().setLevel(logging.getLevelName(verbosity))
+
+
+# Main Logic
+
+if args.command == 'record':
+    program = load_program(args.input_file)
+    inputs = list(map(int, args.inputs.split(','))) if args.inputs else []
+
+    recorder = TraceRecorder(args.capacity)
+    computer = Computer(program, inputs, tracer=recorder)
+    outputs = list(computer.run())
+    recorder.dump(args.trace_file, computer.program)
+
+    logging.info(f'Outputs: {outputs}')
+    logging.info(f'Recorded {min(recorder.steps, recorder.capacity)} of {recorder.steps} steps to {args.trace_file}')
+else:
+    trace = load_trace(args.trace_file)
+    logging.info(f'Steps {trace.first_step}-{trace.end_step - 1}')
+
+    for step in range(max(trace.first_step, trace.end_step - args.last), trace.end_step):
+        address, *cells, write_index, old_value, new_value = trace.row(step)
+        line = f'{step:>8} @{address:<6} {cells}'
+        if write_index >= 0:
+            line += f'  [{write_index}] {old_value} -> {new_value}'
+        logging.info(line)
+
+    if args.step is not None:
+        logging.info(f'Memory before step {args.step}: {trace.memory_at(args.step)}')
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import tempfile
+import time
+
+from dataclasses import dataclass
+from typing import Iterable, List, Optional
+
+from intcodes import Computer
+
+
+# Bump when the entry format or the meaning of a key changes
+CACHE_VERSION = 1
+
+
+def memory_digest(memory: Iterable[int]) -> str:
+    return hashlib.sha256(','.join(map(str, memory)).encode()).hexdigest()
+
+
+def cache_key(program: Iterable[int], inputs: Iterable[int]) -> str:
+    # Inputs are length-prefixed so a program/input split can't collide with another
+    inputs = list(inputs)
+    text = f'{CACHE_VERSION};{",".join(map(str, program))};{len(inputs)};{",".join(map(str, inputs))}'
+    return hashlib.sha256(text.encode()).hexdigest()
+
+
+@dataclass
+class CachedResult:
+    outputs: List[int]
+    memory_digest: str  # Digest of memory once the program halted
+
+
+@dataclass
+class ResultCache:
+    '''On-disk memoization of Computer.run() for programs that halt.
+
+    Each (program image, input sequence) pair maps to one small JSON file
+    holding the output stream and a digest of the final memory. Hits refresh
+    the file's modification time, and once the directory grows past
+    max_bytes the least recently used entries are deleted, down to
+    evict_to_fraction of it so the next few inserts don't evict again.
+
+    The directory's size is scanned once on start-up and then tracked in
+    memory; only eviction scans it again (which also picks up entries added
+    by other processes in the meantime). Temporary files left behind by
+    writers that died mid-put are swept at start-up once they are older than
+    stale_temp_seconds.
+
+    Only non-interactive runs whose inputs are all known up front can be
+    cached; runs that fail (e.g. by running out of input) store nothing.
+    '''
+    directory: str
+    max_bytes: int = 64 << 20
+    evict_to_fraction: float = 0.9
+    stale_temp_seconds: float = 3600
+
+    def __post_init__(self):
+        os.makedirs(self.directory, exist_ok=True)
+        self.hits = 0
+        self.misses = 0
+        self._sweep_temp_files()
+        self.total_bytes = sum(size for _, size, _ in self._entries())
+
+    def _sweep_temp_files(self):
+        # Younger ones may still be being written by another process
+        cutoff = time.time() - self.stale_temp_seconds
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.tmp'):
+                    try:
+                        if entry.stat().st_mtime < cutoff:
+                            os.remove(entry.path)
+                    except FileNotFoundError:
+                        pass  # Finished or swept by another process
+
+    def _entries(self):
+        # (modification time, size, path) of every entry on disk
+        entries = []
+        with os.scandir(self.directory) as scan:
+            for entry in scan:
+                if entry.name.endswith('.json'):
+                    try:
+                        stat = entry.stat()
+                    except FileNotFoundError:
+                        continue  # Evicted by another process mid-scan
+                    entries.append((stat.st_mtime, stat.st_size, entry.path))
+        return entries
+
+    def _path(self, key):
+        return os.path.join(self.directory, f'{key}.json')
+
+    def get(self, program, inputs) -> Optional[CachedResult]:
+        path = self._path(cache_key(program, inputs))
+        try:
+            with open(path) as f:
+                entry = json.load(f)
+            os.utime(path)  # Mark as recently used
+        except (OSError, ValueError):
+            return None  # Missing, or evicted by another process since the read
+
+        return CachedResult(entry['outputs'], entry['memory_digest'])
+
+    def put(self, program, inputs, result: CachedResult):
+        # Write to a temporary file first so readers never see half an entry
+        handle, temp_path = tempfile.mkstemp(dir=self.directory, suffix='.tmp')
+        with os.fdopen(handle, 'w') as f:
+            json.dump({'outputs': result.outputs, 'memory_digest': result.memory_digest}, f)
+        size = os.path.getsize(temp_path)
+
+        path = self._path(cache_key(program, inputs))
+        try:
+            self.total_bytes -= os.stat(path).st_size  # Replacing an existing entry
+        except FileNotFoundError:
+            pass
+        os.replace(temp_path, path)
+        self.total_bytes += size
+
+        if self.total_bytes > self.max_bytes:
+            self.evict()
+
+    def evict(self):
+        entries = self._entries()
+        total = sum(size for _, size, _ in entries)
+        target = self.max_bytes * self.evict_to_fraction
+
+        for _, size, path in sorted(entries):
+            if total <= target:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass  # Already evicted by another process
+            total -= size
+
+        self.total_bytes = total
+
+    def run(self, program: List[int], inputs: Iterable[int], **computer_args) -> CachedResult:
+        # computer_args are passed to Computer on a miss; they must not change
+        # what the program computes (e.g. cache_instructions, profiler)
+        inputs = list(inputs)
+        result = self.get(program, inputs)
+        if result is not None:
+            self.hits += 1
+            return result
+
+        self.misses += 1
+        computer = Computer(program.copy(), inputs, **computer_args)
+        outputs = list(computer.run())
+        result = CachedResult(outputs, memory_digest(computer.program))
+        self.put(program, inputs, result)
+        return result
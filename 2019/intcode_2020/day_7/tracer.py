@@ -0,0 +1,133 @@
+from array import array
+from dataclasses import dataclass
+from functools import wraps
+from typing import Dict, List, Tuple
+
+
+# Each step is one row of ROW_WIDTH int64 values:
+#   address, instruction, operand 1, operand 2, operand 3,
+#   write address (-1 if nothing was written), value before write, value written
+ROW_WIDTH = 8
+NO_WRITE = -1
+
+# File layout (all int64): header, final memory, rows (oldest first)
+TRACE_MAGIC = 0x49435452  # 'ICTR'
+HEADER_WIDTH = 4          # magic, first step, row count, memory length
+
+
+@dataclass
+class TraceRecorder:
+    '''Records the last `capacity` executed steps into an array('q') ring buffer.
+
+    Rows hold the value each write replaced, so any retained step can be
+    rebuilt backwards from the final memory (see Trace.memory_at) without
+    running the program again. Values must fit in an int64.
+    '''
+    capacity: int = 1 << 16
+
+    def __post_init__(self):
+        self.rows = array('q', bytes(8 * ROW_WIDTH * self.capacity))
+        self.position = 0  # Next row to overwrite
+        self.steps = 0     # Total steps recorded, including overwritten ones
+
+    def instrument(self, machine, opcode_map) -> Dict:
+        # Route the machine's writes through the recorder, then wrap each
+        # handler to open a row before it runs
+        rows = self.rows
+        write = machine.write
+        current_row = 0
+
+        def traced_write(program_index, value):
+            rows[current_row + 5] = program_index
+            rows[current_row + 6] = machine.program[program_index]
+            rows[current_row + 7] = value
+            write(program_index, value)
+
+        machine.write = traced_write
+
+        def wrap(handler):
+            @wraps(handler)
+            def traced(mode):
+                nonlocal current_row
+                current_row = self.position * ROW_WIDTH
+
+                address = machine.inst
+                cells = machine.program[address:address + 4]
+                rows[current_row] = address
+                for offset in range(4):
+                    rows[current_row + 1 + offset] = cells[offset] if offset < len(cells) else 0
+                rows[current_row + 5] = NO_WRITE
+                rows[current_row + 6] = rows[current_row + 7] = 0
+
+                output = handler(mode)
+
+                self.position = (self.position + 1) % self.capacity
+                self.steps += 1
+                return output
+            return traced
+
+        return {opcode: wrap(handler) for opcode, handler in opcode_map.items()}
+
+    def ordered_rows(self) -> array:
+        # Retained rows, oldest first
+        if self.steps < self.capacity:
+            return self.rows[:self.steps * ROW_WIDTH]
+        split = self.position * ROW_WIDTH
+        return self.rows[split:] + self.rows[:split]
+
+    def dump(self, path, memory: List[int]):
+        # memory is the machine's memory after the last recorded step
+        rows = self.ordered_rows()
+        row_count = len(rows) // ROW_WIDTH
+        with open(path, 'wb') as f:
+            array('q', [TRACE_MAGIC, self.steps - row_count, row_count, len(memory)]).tofile(f)
+            array('q', memory).tofile(f)
+            rows.tofile(f)
+
+
+@dataclass
+class Trace:
+    first_step: int
+    memory: List[int]  # Memory after the last step
+    rows: array
+
+    @property
+    def end_step(self):
+        # One past the last recorded step
+        return self.first_step + len(self.rows) // ROW_WIDTH
+
+    def row(self, step) -> Tuple[int, ...]:
+        if not self.first_step <= step < self.end_step:
+            raise IndexError(f'Step {step} is not in the trace ({self.first_step}-{self.end_step - 1})')
+        start = (step - self.first_step) * ROW_WIDTH
+        return tuple(self.rows[start:start + ROW_WIDTH])
+
+    def memory_at(self, step) -> List[int]:
+        # Memory as it was just before `step` ran (or after the last step,
+        # for step == end_step), rebuilt by undoing later writes
+        if not self.first_step <= step <= self.end_step:
+            raise IndexError(f'Step {step} is not in the trace ({self.first_step}-{self.end_step})')
+
+        memory = self.memory.copy()
+        for undo_step in range(self.end_step - 1, step - 1, -1):
+            start = (undo_step - self.first_step) * ROW_WIDTH
+            write_index = self.rows[start + 5]
+            if write_index != NO_WRITE:
+                memory[write_index] = self.rows[start + 6]
+        return memory
+
+
+def load_trace(path) -> Trace:
+    with open(path, 'rb') as f:
+        header = array('q')
+        header.fromfile(f, HEADER_WIDTH)
+        magic, first_step, row_count, memory_length = header
+        if magic != TRACE_MAGIC:
+            raise ValueError(f'{path} is not an Intcode trace')
+
+        memory = array('q')
+        memory.fromfile(f, memory_length)
+        rows = array('q')
+        rows.fromfile(f, row_count * ROW_WIDTH)
+
+    return Trace(first_step, memory.tolist(), rows)
@@ -0,0 +1,132 @@
+import argparse
+import io
+import json
+import os
+import resource
+import runpy
+import sys
+import time
+
+from contextlib import redirect_stdout
+
+# Runs one Intcode engine on one program in a fresh interpreter and prints a
+# JSON result line. Every engine lives in its own day directory with
+# clashing module names (parser.py, memory.py, ...), so run.py starts a new
+# process per measurement instead of importing them side by side.
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Engines that read inputs with input() and print outputs
+INPUT_PROMPT = 'Gimme a number!'
+
+# name: (directory, supports only opcodes 1, 2 and 99)
+ENGINES = {
+    'day_2': ('day_2', True),
+    'day_5': ('day_5', False),
+    'day_7': ('day_7', False),
+    'intcode_2020/day_5': ('intcode_2020/day_5', False),
+    'intcode_2020/day_7': ('intcode_2020/day_7', False),
+    'intcode_2020/day_7 (cached)': ('intcode_2020/day_7', False),
+    'intcode_2020/day_7 (compiled)': ('intcode_2020/day_7', False)
+}
+
+
+# Helper Functions
+
+def printed_outputs(text):
+    # Outputs from print(), with input prompts stripped off
+    return [int(line) for line in text.replace(INPUT_PROMPT, '').split()]
+
+
+def load_engine(engine, program_file, inputs):
+    # Returns a callable that runs the program and returns its outputs (None
+    # if the engine doesn't report them). Imports happen here, so they count
+    # towards startup rather than run time.
+    directory = os.path.join(ROOT, ENGINES[engine][0])
+    sys.path.insert(0, directory)
+    sys.stdin = io.StringIO(''.join(f'{value}\n' for value in inputs))
+
+    with open(program_file) as f:
+        program = list(map(int, f.read().split(',')))
+
+    # Script-only engines load the program themselves and talk over stdin/stdout
+    def run_script(script):
+        def run():
+            captured = io.StringIO()
+            with redirect_stdout(captured):
+                sys.argv = [script, program_file]
+                runpy.run_path(os.path.join(directory, script), run_name='__main__')
+            return printed_outputs(captured.getvalue())
+        return run
+
+    if engine == 'day_2':
+        run_day_2 = run_script('run.py')
+
+        def run():
+            run_day_2()
+            return None  # Only logs its answer
+        return run
+    if engine == 'intcode_2020/day_5':
+        return run_script('main.py')
+
+    if engine in ('day_5', 'day_7'):
+        # Each engine's directory is first on sys.path, so this is its own Parser
+        from parser import Parser
+
+    if engine == 'day_5':
+        def run():
+            captured = io.StringIO()
+            with redirect_stdout(captured):
+                Parser(program).run()
+            return printed_outputs(captured.getvalue())
+        return run
+    if engine == 'day_7':
+        # Parser pops inputs from the end of its queue
+        return lambda: list(Parser(program, inputs[::-1]).run())
+
+    from intcodes import Computer
+    if engine.endswith('(compiled)'):
+        return lambda: list(Computer(program, inputs).run_compiled())
+    cache_instructions = engine.endswith('(cached)')
+    return lambda: list(Computer(program, inputs, cache_instructions=cache_instructions).run())
+
+
+def count_instructions(program_file, inputs):
+    # Executed instruction count, from the profiled reference engine
+    sys.path.insert(0, os.path.join(ROOT, 'intcode_2020/day_7'))
+    from intcodes import Computer
+    from profiler import Profiler
+
+    with open(program_file) as f:
+        program = list(map(int, f.read().split(',')))
+
+    profiler = Profiler()
+    outputs = list(Computer(program, inputs, profiler=profiler).run())
+    return profiler.instructions, outputs
+
+
+# Main Logic
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser()
+    parser.add_argument('engine', help=f'engine to run ({"|".join(ENGINES)}), or "count"')
+    parser.add_argument('program_file', help='program file to run')
+    parser.add_argument('--inputs', default='', help='comma-separated values fed to the program, in order')
+    args = parser.parse_args()
+
+    inputs = list(map(int, args.inputs.split(','))) if args.inputs else []
+
+    if args.engine == 'count':
+        instructions, outputs = count_instructions(args.program_file, inputs)
+        result = {'instructions': instructions, 'outputs': outputs, 'seconds': 0}
+    else:
+        run = load_engine(args.engine, args.program_file, inputs)
+        rss_before = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        start = time.perf_counter()
+        outputs = run()
+        result = {'outputs': outputs, 'seconds': time.perf_counter() - start}
+        result['peak_rss_growth_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss - rss_before
+    result['peak_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    print(json.dumps(result))
@@ -0,0 +1,161 @@
+import argparse
+import json
+import logging
+import os
+import platform
+import subprocess
+import sys
+import tempfile
+import time
+
+from engines import ENGINES
+
+# Parse Arguments
+
+parser = argparse.ArgumentParser()
+parser.add_argument('--engines', nargs='+', choices=list(ENGINES), default=list(ENGINES), help='engines to benchmark')
+parser.add_argument('--repeat', type=int, default=3, help='runs per engine and workload; the fastest is kept')
+parser.add_argument('--loop-count', type=int, default=100000, help='iterations of the synthetic loop program')
+parser.add_argument('--straight-length', type=int, default=20000, help='instructions in the synthetic straight-line program')
+parser.add_argument('--output', help='write results to this JSON file')
+parser.add_argument('--baseline', help='JSON results from an earlier run to compare against')
+parser.add_argument('--tolerance', type=float, default=0.9, help='flag engines slower than this fraction of the baseline')
+parser.add_argument('--verbosity', help='specify verbosity level (DEBUG|INFO)')
+args = parser.parse_args()
+
+verbosity = 'INFO'
+if args.verbosity:
+    verbosity = args.verbosity
+logging.getLogger().setLevel(logging.getLevelName(verbosity))
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+ROOT = os.path.dirname(SCRIPT_DIR)
+
+
+# Helper Functions
+
+def loop_program(count):
+    # Counts [100] down from `count`, accumulating into [101], then outputs it
+    return [
+        1101, count, 0, 100,   # 0: [100] = count
+        1, 100, 101, 101,      # 4: [101] += [100]
+        1001, 100, -1, 100,    # 8: [100] -= 1
+        1005, 100, 4,          # 12: if [100]: goto 4
+        4, 101,                # 15: output [101]
+        99                     # 17
+    ] + [0] * (102 - 18)
+
+
+def straight_program(length):
+    # Alternating add/mul over two cells past the code, for engines without jumps
+    data = 4 * length + 1
+    program = []
+    for i in range(length):
+        program += [1 if i % 2 == 0 else 2, data, data + 1, data + 1]
+    return program + [99, 1, 1]
+
+
+def run_child(engine, program_file, inputs):
+    command = [sys.executable, os.path.join(SCRIPT_DIR, 'engines.py'), engine, program_file]
+    if inputs:
+        command += ['--inputs', ','.join(map(str, inputs))]
+
+    start = time.perf_counter()
+    completed = subprocess.run(command, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if completed.returncode != 0:
+        raise RuntimeError(f'{engine} failed on {program_file}:\n{completed.stderr}')
+
+    result = json.loads(completed.stdout.strip().splitlines()[-1])
+    result['wall_seconds'] = wall
+    return result
+
+
+def measure(engine, program_file, inputs, instructions, repeat):
+    runs = [run_child(engine, program_file, inputs) for _ in range(repeat)]
+    best = min(runs, key=lambda run: run['seconds'])
+    return {
+        'seconds': best['seconds'],
+        'wall_seconds': min(run['wall_seconds'] for run in runs),
+        'instructions_per_second': instructions / best['seconds'] if best['seconds'] > 0 else None,
+        'peak_rss_kb': max(run['peak_rss_kb'] for run in runs),
+        'peak_rss_growth_kb': max(run['peak_rss_growth_kb'] for run in runs),
+        'outputs': best['outputs']
+    }
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+# Load Inputs
+
+with tempfile.TemporaryDirectory() as scratch:
+    def write_program(name, program):
+        path = os.path.join(scratch, name)
+        with open(path, 'w') as f:
+            f.write(','.join(map(str, program)))
+        return path
+
+    # name: (program file, inputs, uses only opcodes 1, 2 and 99)
+    workloads = {
+        'day_2': (os.path.join(ROOT, 'day_2/input_1.txt'), [], True),
+        'day_5 (input 1)': (os.path.join(ROOT, 'day_5/input_1.txt'), [1], False),
+        'day_5 (input 5)': (os.path.join(ROOT, 'day_5/input_1.txt'), [5], False),
+        'day_7 (phase 4)': (os.path.join(ROOT, 'day_7/input_1.txt'), [4, 0], False),
+        'synthetic loop': (write_program('loop.txt', loop_program(args.loop_count)), [], False),
+        'synthetic straight': (write_program('straight.txt', straight_program(args.straight_length)), [], True)
+    }
+    halt_file = write_program('halt.txt', [99])
+
+    # Main Logic
+
+    results = {'revision': git_revision(), 'python': platform.python_version(), 'startup': {}, 'workloads': {}}
+
+    # Startup cost: interpreter launch, imports and setup on a program that halts immediately
+    for engine in args.engines:
+        startup = measure(engine, halt_file, [], 1, args.repeat)
+        results['startup'][engine] = {'wall_seconds': startup['wall_seconds'], 'peak_rss_kb': startup['peak_rss_kb']}
+        logging.info(f'[startup] {engine}: {startup["wall_seconds"] * 1000:.1f}ms, {startup["peak_rss_kb"]} KiB')
+
+    for workload, (program_file, inputs, arithmetic_only) in workloads.items():
+        reference = run_child('count', program_file, inputs)
+        workload_results = {'instructions': reference['instructions'], 'engines': {}}
+
+        for engine in args.engines:
+            if ENGINES[engine][1] and not arithmetic_only:
+                continue
+            result = measure(engine, program_file, inputs, reference['instructions'], args.repeat)
+            if result['outputs'] is not None and result['outputs'] != reference['outputs']:
+                logging.warning(f'[{workload}] {engine} output {result["outputs"]} != {reference["outputs"]}')
+            del result['outputs']
+            workload_results['engines'][engine] = result
+
+            logging.info(
+                f'[{workload}] {engine}: {result["seconds"]:.3f}s, '
+                f'{result["instructions_per_second"] or 0:,.0f} instr/s, '
+                f'{result["peak_rss_kb"]} KiB peak (+{result["peak_rss_growth_kb"]} KiB while running)'
+            )
+        results['workloads'][workload] = workload_results
+
+if args.output:
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    logging.info(f'Wrote results to {args.output}')
+
+if args.baseline:
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    logging.info(f'Comparing against {baseline.get("revision")}')
+
+    for workload, workload_results in results['workloads'].items():
+        for engine, result in workload_results['engines'].items():
+            previous = baseline.get('workloads', {}).get(workload, {}).get('engines', {}).get(engine)
+            if previous is None or not previous['instructions_per_second'] or not result['instructions_per_second']:
+                continue
+            ratio = result['instructions_per_second'] / previous['instructions_per_second']
+            log = logging.warning if ratio < args.tolerance else logging.info
+            log(f'[{workload}] {engine}: {ratio:.2f}x baseline')